@@ -0,0 +1,132 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from .counselor import counselor_cache
+from .llm import llm_calls, llm_flight, token_usage
+from .jobs import job_queue
+from .ratelimit import rate_limiter
+from .startup import startup_profile
+from .http_cache import recommend_cache, response_cache
+from .snapshot import snapshot_store
+from .career_logic import career_rules
+from .nearest import nearest_indexes
+from .comparisons import comparison_warmer
+from .overload import overload
+from .catalogue import catalogue_stats
+from .utils import is_admin_token
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+# ============================
+# METRICS
+# ============================
+
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "counselor_cache": counselor_cache.stats(),
+        "llm_singleflight": llm_flight.stats(),
+        "llm_in_flight": llm_calls.stats(),
+        "llm_tokens": token_usage.stats(),
+        "job_queue": job_queue.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "response_cache": response_cache.stats(),
+        "recommend_cache": recommend_cache.stats(),
+        "college_snapshot": snapshot_store.stats(),
+        "nearest_indexes": nearest_indexes.stats(),
+        "compare_prefetch": comparison_warmer.stats(),
+        "overload": overload.stats(),
+        "catalogue": catalogue_stats()
+    }
+
+
+@router.get("/startup")
+async def get_startup_profile():
+    return startup_profile.report()
+
+
+# ============================
+# COUNSELOR ANSWER CACHE
+# ============================
+
+@router.get("/counselor-cache")
+async def inspect_counselor_cache(limit: int = 50):
+    return {
+        "stats": counselor_cache.stats(),
+        "entries": counselor_cache.entries(limit=limit)
+    }
+
+
+@router.delete("/counselor-cache")
+async def purge_counselor_cache():
+    removed = counselor_cache.purge()
+    return {"message": "Cache purged", "removed": removed}
+
+
+@router.delete("/counselor-cache/{entry_id}")
+async def delete_counselor_cache_entry(entry_id: str):
+    removed = counselor_cache.purge(entry_id)
+
+    if not removed:
+        raise HTTPException(status_code=404, detail="Cache entry not found")
+
+    return {"message": "Cache entry removed"}
+
+
+# ============================
+# CAREER RULES
+# ============================
+
+@router.get("/career-rules")
+async def get_career_rules():
+    return career_rules.stats()
+
+
+@router.post("/career-rules/reload")
+async def reload_career_rules():
+    if not career_rules.reload():
+        raise HTTPException(status_code=400, detail="Career rules file is invalid, previous rules kept")
+
+    return career_rules.stats()
+
+
+# ============================
+# COMPARISON PREFETCH
+# ============================
+
+@router.post("/compare-prefetch")
+async def run_compare_prefetch():
+    """Warm popular comparisons now, ignoring the off-peak window but not the token budget."""
+    warmed = await comparison_warmer.warm_once()
+    return {"warmed": warmed, **comparison_warmer.stats()}
+
+
+# ============================
+# OVERLOAD CONTROL
+# ============================
+
+@router.get("/overload")
+async def get_overload_state():
+    return overload.stats()
+
+
+@router.post("/overload")
+async def set_overload_mode(mode: str):
+    """Pin the service to `normal` or `degraded`, or hand control back with `auto`."""
+    try:
+        overload.force(None if mode == "auto" else mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return overload.stats()
@@ -6,6 +6,7 @@ from .database import get_db
 from .models import User
 from .schemas import RegisterRequest, LoginRequest
 from .utils import hash_password, verify_password
+from .profiling import span
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -22,11 +23,14 @@ async def register_user(data: RegisterRequest, db: AsyncSession = Depends(get_db
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
+    with span("hashing"):
+        hashed_password = hash_password(data.password)
+
     new_user = User(
         name=data.name,
         email=data.email,
         phone=data.phone,
-        password=hash_password(data.password)
+        password=hashed_password
     )
 
     db.add(new_user)
@@ -42,7 +46,10 @@ async def login_user(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(data.password, user.password):
+    with span("hashing"):
+        valid = bool(user) and verify_password(data.password, user.password)
+
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     return {
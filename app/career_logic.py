@@ -1,52 +1,160 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = Path(os.getenv(
+    "CAREER_RULES_PATH",
+    Path(__file__).resolve().parent / "data" / "career_rules.json"
+))
+
+# How often lookups stat() the rules file to pick up edits
+RELOAD_CHECK_SECONDS = float(os.getenv("CAREER_RULES_RELOAD_SECONDS", "5"))
+
+
+def compile_rules(raw: dict) -> dict:
+    """
+    Compile the rules file into {EXAM: (thresholds, careers)}.
+
+    `thresholds` are the sorted tier minimums above the lowest tier, so
+    bisect_right(thresholds, percentile) is directly the index into
+    `careers`; the lowest tier catches everything below the next one.
+    """
+    table = {}
+
+    for exam, spec in raw.items():
+        tiers = sorted(spec["tiers"], key=lambda tier: tier["min_percentile"])
+        compiled = (
+            [float(tier["min_percentile"]) for tier in tiers[1:]],
+            tuple(tuple(tier["careers"]) for tier in tiers)
+        )
+
+        for name in [exam] + spec.get("aliases", []):
+            table[name.strip().upper()] = compiled
+
+    return table
+
+
+class CareerRules:
+
+    def __init__(self, path: Path = RULES_PATH):
+        self.path = path
+        self._table = {}
+        self._exams = []
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        # Bumped on every successful reload; cached responses that embed
+        # careers key on it so edits are visible without a new dataset version
+        self.generation = 0
+        self.reload()
+
+    def reload(self) -> bool:
+        """Recompile from disk; on a bad file the previous rules stay live."""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime
+                with open(self.path) as f:
+                    raw = json.load(f)
+                table = compile_rules(raw)
+            except Exception:
+                logger.exception("Could not load career rules from %s", self.path)
+                return False
+
+            self._table = table
+            self._exams = sorted(exam.strip().upper() for exam in raw)
+            self._mtime = mtime
+            self.reloads += 1
+            self.generation += 1
+            return True
+
+    def check(self) -> int:
+        """Pick up file edits (throttled) and return the current generation."""
+        self._maybe_reload()
+        return self.generation
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+
+        if mtime != self._mtime:
+            self.reload()
+
+    def lookup(self, exam: str, percentile: float) -> list:
+        self._maybe_reload()
+
+        rule = self._table.get(exam.strip().upper())
+        if rule is None:
+            return []
+
+        thresholds, careers = rule
+        return list(careers[bisect_right(thresholds, percentile)])
+
+    def lookup_batch(self, exams, percentiles) -> list:
+        """
+        Vectorized lookup: one searchsorted per distinct exam. Returns a
+        career tuple per input (shared, not copied), empty for unknown exams.
+        """
+        self._maybe_reload()
+
+        percentiles = np.asarray(percentiles, dtype=np.float64)
+        results = [()] * len(percentiles)
+
+        by_exam = {}
+        for i, exam in enumerate(exams):
+            by_exam.setdefault(exam, []).append(i)
+
+        for exam, indices in by_exam.items():
+            rule = self._table.get(exam.strip().upper())
+            if rule is None:
+                continue
+
+            thresholds, careers = rule
+            tiers = np.searchsorted(thresholds, percentiles[indices], side="right")
+            for i, tier in zip(indices, tiers.tolist()):
+                results[i] = careers[tier]
+
+        return results
+
+    def exams(self) -> list:
+        """Canonical exam names; aliases are accepted by lookups but not listed."""
+        return list(self._exams)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "exams": self.exams(),
+            "aliases": len(self._table) - len(self._exams),
+            "reloads": self.reloads,
+            "generation": self.generation,
+            "loaded_mtime": self._mtime,
+        }
+
+
+career_rules = CareerRules()
+
+
 def recommend_careers(exam: str, percentile: float):
-    careers = []
-
-    if exam == "MHT-CET":
-        if percentile >= 95:
-            careers = [
-                "Software Engineer",
-                "AI / ML Engineer",
-                "Data Scientist",
-                "Cyber Security Engineer"
-            ]
-        elif percentile >= 85:
-            careers = [
-                "IT Engineer",
-                "Computer Engineer",
-                "Electronics Engineer"
-            ]
-        elif percentile >= 70:
-            careers = [
-                "Applied IT",
-                "Automation Engineer",
-                "Technical Analyst"
-            ]
-        else:
-            careers = [
-                "Diploma Engineering",
-                "Skill-based IT Roles",
-                "Polytechnic Path"
-            ]
-
-    elif exam == "JEE":
-        if percentile >= 98:
-            careers = [
-                "Core Software Engineer",
-                "Research Engineer",
-                "AI Engineer"
-            ]
-        elif percentile >= 90:
-            careers = [
-                "IT Engineer",
-                "Electronics Engineer"
-            ]
-        else:
-            careers = [
-                "Private Engineering Colleges",
-                "Skill-based Technical Roles"
-            ]
-
-    return careers
+    return career_rules.lookup(exam, percentile)
+
+
+def recommend_careers_batch(exams, percentiles):
+    return career_rules.lookup_batch(exams, percentiles)
 
 
 def build_guidance_prompt(student_type: str, answers: dict) -> str:
@@ -59,10 +167,10 @@ Student answers:
 {answers}
 
 Tasks:
-1. Analyze interests and background
-2. Estimate chances of success
-3. Suggest suitable domains
-4. Provide a clear step-by-step roadmap
+1. Identify up to 3 strengths
+2. Suggest up to 4 suitable domains
+3. Provide a roadmap of up to 4 short steps
+4. Estimate chances of success in one sentence
 
-Respond in simple, structured text.
+Respond only with JSON matching the given schema. Keep every item short.
 """
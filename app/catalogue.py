@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.util import greenlet_spawn
+
+from .database import CATALOGUE_SQLITE_PATH, catalogue_engine
+from .models import AppMeta, College
+
+logger = logging.getLogger(__name__)
+
+# ==============================
+# Read-only SQLite catalogue
+# ==============================
+# `load_csv.py --sqlite <path>` publishes the colleges table (plus the
+# dataset version in app_meta) as a standalone SQLite file. It is built
+# next to the target and moved into place with os.replace, so readers see
+# either the old file or the new one, never a partial write.
+
+# Indexes for the filters the recommendation router runs. Created with raw
+# DDL so they never become part of the Postgres schema.
+CATALOGUE_INDEXES = (
+    "CREATE INDEX ix_catalogue_cutoff ON colleges (cutoff_percentile)",
+    "CREATE INDEX ix_catalogue_city_fees ON colleges (city, fees)",
+    "CREATE INDEX ix_catalogue_fees ON colleges (fees)",
+)
+
+
+def write_catalogue(rows, version: str, path) -> Path:
+    """
+    Write `rows` of (id, college_name, branch_name, cutoff_percentile, fees,
+    city, content_hash) to a new catalogue file and atomically swap it in.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    columns = ("id", "college_name", "branch_name", "cutoff_percentile", "fees", "city", "content_hash")
+    sync_engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        College.metadata.create_all(sync_engine, tables=[College.__table__, AppMeta.__table__])
+
+        with sync_engine.begin() as conn:
+            values = [dict(zip(columns, row)) for row in rows]
+            if values:
+                conn.execute(insert(College), values)
+            conn.execute(insert(AppMeta), [{"key": "dataset_version", "value": version}])
+
+            for statement in CATALOGUE_INDEXES:
+                conn.execute(text(statement))
+            conn.execute(text("ANALYZE"))
+    finally:
+        sync_engine.dispose()
+
+    # Compact the file outside any transaction
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def catalogue_version(path) -> str:
+    """dataset_version stored in a published catalogue file, or None."""
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM app_meta WHERE key = 'dataset_version'").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def catalogue_stats() -> dict:
+    if not CATALOGUE_SQLITE_PATH:
+        return {"enabled": False}
+
+    path = Path(CATALOGUE_SQLITE_PATH)
+    if not path.exists():
+        return {"enabled": True, "path": str(path), "exists": False}
+
+    stat = path.stat()
+    return {
+        "enabled": True,
+        "path": str(path),
+        "exists": True,
+        "version": catalogue_watcher.version,
+        "reopens": catalogue_watcher.reopens,
+        "size_bytes": stat.st_size,
+        "published_at": stat.st_mtime,
+        "age_seconds": round(time.time() - stat.st_mtime, 1),
+    }
+
+
+class CatalogueWatcher:
+    """
+    Tracks the catalogue file being served. When CATALOGUE_SQLITE_PATH is
+    set, the version in the file's own app_meta (not the Postgres one) is
+    the dataset version: it is what college reads actually return.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.version = None
+        self._stamp = None
+        self.reopens = 0
+
+    def poll(self) -> str:
+        """Current catalogue version; the file is only read when it was replaced."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return self.version
+
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._stamp:
+            return self.version
+
+        version = catalogue_version(self.path)
+        if self._stamp is not None:
+            self._reopen()
+        self._stamp = stamp
+        self.version = version
+        return version
+
+    def _reopen(self):
+        # Pooled connections keep the replaced file open; swap in a fresh
+        # pool so new sessions open the new file, then close the old one.
+        old_pool = catalogue_engine.sync_engine.pool
+        catalogue_engine.sync_engine.dispose(close=False)
+        asyncio.get_running_loop().create_task(greenlet_spawn(old_pool.dispose))
+        self.reopens += 1
+        logger.info("Reopened college catalogue %s", self.path)
+
+
+catalogue_watcher = CatalogueWatcher(CATALOGUE_SQLITE_PATH) if CATALOGUE_SQLITE_PATH else None
@@ -0,0 +1,526 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import tempfile
+import time
+from collections import Counter, OrderedDict, namedtuple
+from datetime import date
+from pathlib import Path
+
+import orjson
+from sqlalchemy import delete, text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .database import AsyncSessionLocal, engine
+from .llm import generate_json
+from .models import CachedComparison
+from .schema import read_meta, write_meta
+from .schemas import AICollegeComparison
+
+logger = logging.getLogger(__name__)
+
+# gemini-2.5-flash counts its thinking tokens against this cap, so it needs
+# room well beyond the few hundred tokens the JSON itself takes.
+COMPARE_MAX_OUTPUT_TOKENS = int(os.getenv("COMPARE_MAX_OUTPUT_TOKENS", "4096"))
+
+# Students within one bucket share a comparison, which is what makes
+# comparisons cacheable and worth prefetching.
+PERCENTILE_BUCKET = float(os.getenv("COMPARE_PERCENTILE_BUCKET", "1.0"))
+
+CollegeInfo = namedtuple("CollegeInfo", "college_name branch_name cutoff_percentile fees city")
+
+
+def college_info(college) -> CollegeInfo:
+    return CollegeInfo(
+        college.college_name,
+        college.branch_name,
+        college.cutoff_percentile,
+        college.fees,
+        college.city
+    )
+
+
+def percentile_bucket(percentile: float) -> float:
+    return math.floor(percentile / PERCENTILE_BUCKET) * PERCENTILE_BUCKET
+
+
+def comparison_key(college1: CollegeInfo, college2: CollegeInfo, exam_type: str,
+                   seat_category: str, student_percentile: float) -> tuple:
+    # The college fields themselves are part of the key, so a data import
+    # that changes either college naturally misses the old entry.
+    return (college1, college2, exam_type, seat_category, percentile_bucket(student_percentile))
+
+
+def build_compare_prompt(key: tuple) -> str:
+    college1, college2, exam_type, seat_category, bucket = key
+
+    return f"""
+Compare these two engineering colleges for a student with about {bucket:g}%ile
+in {exam_type} ({seat_category} category).
+
+College 1:
+- Name: {college1.college_name}
+- Branch: {college1.branch_name}
+- Cutoff: {college1.cutoff_percentile}%
+- Fees: ₹{college1.fees}
+- City: {college1.city}
+
+College 2:
+- Name: {college2.college_name}
+- Branch: {college2.branch_name}
+- Cutoff: {college2.cutoff_percentile}%
+- Fees: ₹{college2.fees}
+- City: {college2.city}
+
+Provide admission chances, cost vs value, location pros/cons, branch
+strength and a final recommendation, one or two sentences each.
+Respond only with JSON matching the given schema.
+"""
+
+
+# ==============================
+# Response cache
+# ==============================
+# Two levels: a small in-process LRU per worker, backed by the compare_cache
+# table so an answer generated (or prefetched) by one worker serves all of
+# them. The table is a cache: if it is unreachable, comparisons are still
+# generated and kept in process.
+
+class ComparisonCache:
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: int = 36 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _fresh(self, stored_at: float) -> bool:
+        return time.time() - stored_at <= self.ttl_seconds
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None or not self._fresh(entry["stored_at"]):
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def contains(self, key: tuple) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and self._fresh(entry["stored_at"])
+
+    def store(self, key: tuple, comparison: dict, prefetched: bool = False, stored_at: float = None):
+        entry = {
+            "comparison": comparison,
+            "stored_at": stored_at or time.time(),
+            "prefetched": prefetched,
+        }
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    # ---------------- shared table ----------------
+
+    async def load_shared(self, key: tuple):
+        try:
+            async with AsyncSessionLocal() as db:
+                row = await db.get(CachedComparison, key_digest(key))
+        except Exception as e:
+            logger.warning("Shared comparison cache unavailable: %s", e)
+            return None
+
+        if row is None or not self._fresh(row.created_at):
+            return None
+
+        return self.store(key, orjson.loads(row.comparison), row.prefetched, stored_at=row.created_at)
+
+    async def save_shared(self, key: tuple, entry: dict):
+        digest = key_digest(key)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(CachedComparison).where(CachedComparison.key == digest))
+                db.add(CachedComparison(
+                    key=digest,
+                    comparison=orjson.dumps(entry["comparison"]).decode(),
+                    created_at=entry["stored_at"],
+                    prefetched=entry["prefetched"],
+                ))
+                await db.commit()
+        except Exception as e:
+            # Another worker stored the same key first, or the DB is away
+            logger.debug("Could not share comparison: %s", e)
+
+    async def prune_shared(self) -> int:
+        """Delete shared rows past the TTL; reads already ignore them."""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    delete(CachedComparison).where(CachedComparison.created_at < time.time() - self.ttl_seconds)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Could not prune shared comparison cache: %s", e)
+            return 0
+        return result.rowcount
+
+    def lookup_local(self, key: tuple):
+        """In-process entry only, never touching the DB; counts towards hit rate."""
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    async def lookup(self, key: tuple):
+        """In-process entry, else the shared one; counts towards hit rate."""
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        entry = await self.load_shared(key)
+        if entry is not None:
+            self.shared_hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    async def is_cached(self, key: tuple) -> bool:
+        return self.contains(key) or await self.load_shared(key) is not None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "prefetched_entries": sum(1 for e in self._entries.values() if e["prefetched"]),
+        }
+
+
+def key_digest(key: tuple) -> str:
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+class PopularityTracker:
+    """Request counts per comparison key, bounded by pruning the long tail."""
+
+    def __init__(self, max_keys: int = 5000):
+        self.max_keys = max_keys
+        self._counts = Counter()
+
+    def record(self, key: tuple):
+        self._counts[key] += 1
+        if len(self._counts) > self.max_keys:
+            self._counts = Counter(dict(self._counts.most_common(self.max_keys // 2)))
+
+    def most_common(self, n: int) -> list:
+        return self._counts.most_common(n)
+
+    def decay(self):
+        """Halve every count so yesterday's favourites fade out."""
+        self._counts = Counter({key: count // 2 for key, count in self._counts.items() if count > 1})
+
+    def __len__(self):
+        return len(self._counts)
+
+
+comparison_cache = ComparisonCache(
+    max_entries=int(os.getenv("COMPARE_CACHE_MAX_ENTRIES", "2000")),
+    ttl_seconds=int(os.getenv("COMPARE_CACHE_TTL_SECONDS", str(36 * 3600))),
+)
+popular_comparisons = PopularityTracker()
+
+
+COMPARISON_SECTIONS = (
+    ("admission_chances", "Admission chances"),
+    ("cost_vs_value", "Cost vs value"),
+    ("location", "Location"),
+    ("branch_strength", "Branch strength"),
+    ("final_recommendation", "Final recommendation"),
+)
+
+
+def comparison_text(details: dict) -> str:
+    """Plain-text comparison, the shape the `comparison` field always had."""
+    return "\n".join(
+        f"{number}. {label}: {details[field]}"
+        for number, (field, label) in enumerate(COMPARISON_SECTIONS, start=1)
+        if details.get(field)
+    )
+
+
+def cached_result(entry: dict) -> dict:
+    # No tokens were spent on this request
+    return {
+        "comparison": comparison_text(entry["comparison"]),
+        "details": entry["comparison"],
+        "usage": None,
+        "cached": True,
+        "stored_at": entry["stored_at"],
+    }
+
+
+def cached_comparison(key: tuple) -> dict:
+    """
+    This worker's cached comparison for `key`, or None. Used while degraded,
+    so it calls neither Gemini nor the DB (DB wait may be what tripped it).
+    """
+    entry = comparison_cache.lookup_local(key)
+    return cached_result(entry) if entry is not None else None
+
+
+async def get_comparison(key: tuple) -> dict:
+    """
+    Cached comparison for `key`, asking Gemini on a miss. None only if
+    Gemini returned nothing at all.
+    """
+    entry = await comparison_cache.lookup(key)
+    if entry is not None:
+        return cached_result(entry)
+
+    result = await generate_json(
+        build_compare_prompt(key),
+        AICollegeComparison,
+        max_output_tokens=COMPARE_MAX_OUTPUT_TOKENS,
+        purpose="compare"
+    )
+    if result["data"] is None:
+        # Truncated or off-schema reply: serve the raw text, but never cache it
+        if not (result["text"] or "").strip():
+            return None
+        return {
+            "comparison": result["text"],
+            "details": None,
+            "usage": result["usage"],
+            "cached": False,
+            "stored_at": None,
+        }
+
+    entry = comparison_cache.store(key, result["data"].model_dump())
+    await comparison_cache.save_shared(key, entry)
+
+    return {
+        "comparison": comparison_text(entry["comparison"]),
+        "details": entry["comparison"],
+        "usage": result["usage"],
+        "cached": False,
+        "stored_at": entry["stored_at"],
+    }
+
+
+# ==============================
+# Off-peak prefetch
+# ==============================
+
+BUDGET_KEY_PREFIX = "prefetch_tokens:"
+
+
+class ComparisonWarmer:
+    """
+    During the off-peak window, precomputes the most requested comparisons
+    that are not cached yet, spending at most `daily_token_budget` Gemini
+    tokens per day.
+
+    Only one worker per host runs the loop (whoever holds `lock_path`), and
+    tokens are counted in app_meta, so the budget holds across workers,
+    hosts and restarts. Popularity is counted by the worker that serves the
+    request, so the leader ranks pairs from its own share of the traffic.
+    """
+
+    def __init__(self, top_n: int = 50, daily_token_budget: int = 200_000,
+                 offpeak_start: int = 1, offpeak_end: int = 6, interval: int = 300,
+                 lock_path: Path = None):
+        self.top_n = top_n
+        self.daily_token_budget = daily_token_budget
+        self.offpeak_start = offpeak_start
+        self.offpeak_end = offpeak_end
+        self.interval = interval
+        self.lock_path = lock_path
+
+        self._task = None
+        self._lock_file = None
+        self._day = date.today()
+        self.tokens_today = 0
+        self.warmed = 0
+        self.failed = 0
+        self.pruned = 0
+        self.runs = 0
+
+    def in_offpeak(self, hour: int = None) -> bool:
+        hour = time.localtime().tm_hour if hour is None else hour
+        if self.offpeak_start <= self.offpeak_end:
+            return self.offpeak_start <= hour < self.offpeak_end
+        # Window wraps midnight, e.g. 22 -> 5
+        return hour >= self.offpeak_start or hour < self.offpeak_end
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self.tokens_today = 0
+            popular_comparisons.decay()
+
+    # ---------------- shared token budget ----------------
+
+    def _budget_key(self) -> str:
+        return f"{BUDGET_KEY_PREFIX}{self._day.isoformat()}"
+
+    async def _tokens_spent(self) -> int:
+        async with engine.connect() as conn:
+            value = await read_meta(conn, self._budget_key())
+        self.tokens_today = int(value or 0)
+        return self.tokens_today
+
+    async def _charge(self, tokens: int):
+        key = self._budget_key()
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    "UPDATE app_meta SET value = CAST(CAST(value AS INTEGER) + :tokens AS VARCHAR) "
+                    "WHERE key = :key"
+                ),
+                {"key": key, "tokens": tokens}
+            )
+            if result.rowcount == 0:
+                # First charge of the day: previous days' counters go
+                await conn.execute(
+                    text("DELETE FROM app_meta WHERE key LIKE :prefix"),
+                    {"prefix": f"{BUDGET_KEY_PREFIX}%"}
+                )
+                await write_meta(conn, key, str(tokens))
+        self.tokens_today += tokens
+
+    # ---------------- leader election ----------------
+
+    def _acquire_leadership(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        if fcntl is None or self.lock_path is None:
+            return True  # no flock (e.g. Windows): every worker may warm, budget still holds
+
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        logger.info("Comparison prefetch runs in this worker (pid %d)", os.getpid())
+        return True
+
+    def _release_leadership(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ---------------- prefetch ----------------
+
+    async def warm_once(self) -> int:
+        """Drop expired shared entries, then prefetch popular comparisons until done or out of budget."""
+        self._roll_day()
+        self.runs += 1
+        warmed = 0
+
+        self.pruned += await comparison_cache.prune_shared()
+
+        for key, _ in popular_comparisons.most_common(self.top_n):
+            if await self._tokens_spent() >= self.daily_token_budget:
+                logger.info("Comparison prefetch stopped: daily token budget spent")
+                break
+            if await comparison_cache.is_cached(key):
+                continue
+
+            try:
+                result = await generate_json(
+                    build_compare_prompt(key),
+                    AICollegeComparison,
+                    max_output_tokens=COMPARE_MAX_OUTPUT_TOKENS,
+                    purpose="prefetch"
+                )
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Comparison prefetch failed: %s", e)
+                continue
+
+            await self._charge(result["usage"]["total_tokens"] or 0)
+            if result["data"] is None:
+                self.failed += 1
+                continue
+
+            entry = comparison_cache.store(key, result["data"].model_dump(), prefetched=True)
+            await comparison_cache.save_shared(key, entry)
+            warmed += 1
+
+        self.warmed += warmed
+        return warmed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # Re-tried every round, so another worker takes over if the leader exits
+            if not self.in_offpeak() or not self._acquire_leadership():
+                continue
+            try:
+                await self.warm_once()
+            except Exception:
+                logger.exception("Comparison prefetch run failed")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._release_leadership()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "leader": self._lock_file is not None,
+            "offpeak_hours": [self.offpeak_start, self.offpeak_end],
+            "in_offpeak": self.in_offpeak(),
+            "top_n": self.top_n,
+            "daily_token_budget": self.daily_token_budget,
+            "tokens_today": self.tokens_today,
+            "tracked_pairs": len(popular_comparisons),
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "pruned": self.pruned,
+            "runs": self.runs,
+            "cache": comparison_cache.stats(),
+        }
+
+
+comparison_warmer = ComparisonWarmer(
+    top_n=int(os.getenv("PREFETCH_TOP_N", "50")),
+    daily_token_budget=int(os.getenv("PREFETCH_DAILY_TOKEN_BUDGET", "200000")),
+    offpeak_start=int(os.getenv("PREFETCH_OFFPEAK_START_HOUR", "1")),
+    offpeak_end=int(os.getenv("PREFETCH_OFFPEAK_END_HOUR", "6")),
+    interval=int(os.getenv("PREFETCH_INTERVAL_SECONDS", "300")),
+    lock_path=Path(os.getenv(
+        "PREFETCH_LOCK_PATH",
+        Path(tempfile.gettempdir()) / "innominds-compare-prefetch.lock"
+    )),
+)
@@ -2,7 +2,10 @@ import os
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from google import genai
+
+from .llm import generate_content
+from .semantic_cache import SemanticCache
+from .overload import overload
 
 # Load environment variables
 load_dotenv()
@@ -12,13 +15,14 @@ router = APIRouter(
     tags=["AI Counselor"]
 )
 
-# Gemini client (same pattern as your other endpoints)
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not found in .env")
-
-client = genai.Client(api_key=GEMINI_API_KEY)
+# ---------------- ANSWER CACHE ----------------
+# Near-duplicate questions ("JEE cutoff for COEP", "how to prepare for
+# MHT-CET in 3 months") are answered from here instead of calling Gemini.
+counselor_cache = SemanticCache(
+    threshold=float(os.getenv("COUNSELOR_CACHE_THRESHOLD", "0.9")),
+    max_entries=int(os.getenv("COUNSELOR_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=int(os.getenv("COUNSELOR_CACHE_TTL_SECONDS", str(24 * 3600))),
+)
 
 # ---------------- SYSTEM PROMPT ----------------
 SYSTEM_PROMPT = """
@@ -43,9 +47,17 @@ class CounselorResponse(BaseModel):
 # ---------------- ROUTE ----------------
 @router.post("/chat", response_model=CounselorResponse)
 async def talk_to_ai_counselor(data: CounselorRequest):
+    cached_reply = counselor_cache.lookup(data.message)
+    if cached_reply is not None:
+        return {"reply": cached_reply}
+
+    if overload.degraded:
+        overload.note_degraded("counselor")
+        raise overload.unavailable("The AI counselor is busy right now, please retry shortly")
+
     try:
-        response = client.models.generate_content(
-                model="models/gemini-2.5-flash",
+        response = await generate_content(
+            purpose="counselor",
             contents=[
                 {
                     "role": "user",
@@ -58,9 +70,13 @@ async def talk_to_ai_counselor(data: CounselorRequest):
             ]
         )
 
+        counselor_cache.store(data.message, response.text)
+
         return {
             "reply": response.text
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -7,7 +7,13 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Users and tasks always live here, even on nodes that read colleges from a
+# local catalogue file; the server may be down, but it must be configured.
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL is not set in environment variables")
+
+# Statement logging is opt-in: echoing every query is costly under load
+engine = create_async_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO") == "1")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -15,8 +21,31 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Read-only college catalogue. When CATALOGUE_SQLITE_PATH points at a file
+# published by `load_csv.py --sqlite`, college reads use it through their own
+# engine; users and tasks always stay on DATABASE_URL.
+CATALOGUE_SQLITE_PATH = os.getenv("CATALOGUE_SQLITE_PATH")
+
+if CATALOGUE_SQLITE_PATH:
+    catalogue_engine = create_async_engine(
+        f"sqlite+aiosqlite:///file:{CATALOGUE_SQLITE_PATH}?mode=ro&uri=true",
+        echo=os.getenv("SQL_ECHO") == "1"
+    )
+else:
+    catalogue_engine = engine
+
+CatalogueSessionLocal = sessionmaker(
+    bind=catalogue_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_catalogue_db():
+    async with CatalogueSessionLocal() as session:
+        yield session
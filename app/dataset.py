@@ -0,0 +1,52 @@
+import logging
+
+from .schema import read_meta, write_meta
+
+logger = logging.getLogger(__name__)
+
+# ==============================
+# Dataset version
+# ==============================
+# load_csv.py bumps `dataset_version` in app_meta after each import. Workers
+# pick it up through the health monitor's periodic refresh, and everything
+# derived from the college data (response caches, ETags, ...) keys on it.
+
+_version = None
+_listeners = []
+
+
+def current_version():
+    return _version
+
+
+def on_version_change(fn):
+    """Register `fn(version)` to run whenever a new dataset version is seen."""
+    _listeners.append(fn)
+    return fn
+
+
+def set_current_version(version):
+    global _version
+
+    if version == _version:
+        return
+
+    logger.info("Dataset version %s -> %s", _version, version)
+    _version = version
+
+    for fn in _listeners:
+        try:
+            fn(version)
+        except Exception:
+            logger.exception("Dataset version listener failed")
+
+
+async def next_dataset_version(conn) -> str:
+    current = await read_meta(conn, "dataset_version")
+    return str(int(current) + 1) if current and current.isdigit() else "1"
+
+
+async def bump_dataset_version(conn) -> str:
+    new_version = await next_dataset_version(conn)
+    await write_meta(conn, "dataset_version", new_version)
+    return new_version
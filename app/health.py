@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .database import engine
+from .schema import ensure_schema, read_meta
+from .llm import get_client
+from .counselor import counselor_cache
+from .dataset import current_version, set_current_version
+from .http_cache import recommend_cache, response_cache
+from .snapshot import snapshot_store
+from .catalogue import catalogue_watcher
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Refreshes dependency health in the background so probes only read a
+    cached snapshot: constant latency, and no DB or Gemini traffic per probe.
+    """
+
+    def __init__(self, interval: int = 15, llm_interval: int = 300):
+        self.interval = interval
+        self.llm_interval = llm_interval
+
+        self.db = {"status": "unknown"}
+        self.llm = {"status": "unknown"}
+
+        # False when the startup schema check could not reach Postgres; it
+        # is retried on the first refresh that can.
+        self.schema_ready = True
+
+        self._task = None
+        self._llm_checked_at = 0.0
+
+    # ---------------- checks ----------------
+
+    async def refresh_db(self):
+        start = time.perf_counter()
+        try:
+            if not self.schema_ready:
+                await ensure_schema(engine)
+                self.schema_ready = True
+            async with engine.connect() as conn:
+                dataset_version = await read_meta(conn, "dataset_version")
+            if catalogue_watcher is None:
+                set_current_version(dataset_version)
+            status = "ok"
+            error = None
+        except Exception as e:
+            status = "error"
+            error = str(e)
+
+        if catalogue_watcher is not None:
+            # College reads come from the catalogue file, so caches and ETags
+            # follow its version, even while Postgres is unreachable.
+            set_current_version(catalogue_watcher.poll())
+
+        pool = engine.sync_engine.pool
+        self.db = {
+            "status": status,
+            "error": error,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "pool": {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "status": pool.status(),
+            },
+            "checked_at": time.time(),
+        }
+
+    async def refresh_llm(self):
+        if not os.getenv("GEMINI_API_KEY"):
+            self.llm = {
+                "status": "not_configured",
+                "api_key_set": False,
+                "checked_at": time.time(),
+            }
+            return
+
+        start = time.perf_counter()
+
+        def first_model():
+            # Only the first page is fetched; the pager is never len()'d
+            models = list(itertools.islice(get_client().models.list(), 1))
+            return models[0].name if models else None
+
+        try:
+            sample_model = await asyncio.to_thread(first_model)
+            self.llm = {"status": "ok", "sample_model": sample_model}
+        except Exception as e:
+            self.llm = {"status": "error", "error": str(e)}
+
+        self.llm.update({
+            "api_key_set": True,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "checked_at": time.time(),
+        })
+
+    async def refresh(self):
+        await self.refresh_db()
+
+        if time.time() - self._llm_checked_at >= self.llm_interval:
+            self._llm_checked_at = time.time()
+            await self.refresh_llm()
+
+    # ---------------- lifecycle ----------------
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Health refresh failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is None:
+            await self.refresh_db()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ---------------- snapshot ----------------
+
+    def readiness(self) -> dict:
+        if self.db["status"] == "ok":
+            status = "ready"
+        elif catalogue_watcher is not None and catalogue_watcher.version is not None:
+            # College reads are still served from the catalogue file; only
+            # users, tasks and the shared caches are unavailable.
+            status = "degraded"
+        else:
+            status = "not_ready"
+
+        return {
+            "status": status,
+            "database": self.db,
+            "llm": self.llm,
+            "cache": {
+                "counselor": counselor_cache.stats(),
+                "responses": response_cache.stats(),
+                "recommend": recommend_cache.stats(),
+                "college_snapshot": snapshot_store.stats(),
+            },
+            "dataset_version": current_version(),
+        }
+
+
+health_monitor = HealthMonitor(
+    interval=int(os.getenv("HEALTH_REFRESH_SECONDS", "15")),
+    llm_interval=int(os.getenv("HEALTH_LLM_REFRESH_SECONDS", "300")),
+)
+
+
+# ==============================
+# Router
+# ==============================
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    report = health_monitor.readiness()
+    status_code = 503 if report["status"] == "not_ready" else 200
+    return JSONResponse(status_code=status_code, content=report)
+
+
+@router.get("/gemini")
+async def gemini_health_check():
+    """Last background Gemini check; never calls Gemini itself."""
+    return health_monitor.llm
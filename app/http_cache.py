@@ -0,0 +1,184 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+import orjson
+from fastapi import Request, Response
+
+from .dataset import current_version, on_version_change
+from .profiling import span
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MIN_COMPRESS_BYTES = 1024
+MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "60"))
+
+
+class ResponseCache:
+    """
+    Serialized (and lazily compressed) JSON bodies for college data
+    responses, keyed by dataset version and request parameters.
+
+    Everything is dropped when the dataset version changes; registered
+    warmers then rebuild the common entries in the background.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._warmers = []
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def clear(self):
+        self._entries.clear()
+
+    def warmer(self, fn):
+        """Register a coroutine function that prefills common entries."""
+        self._warmers.append(fn)
+        return fn
+
+    async def warm(self):
+        for fn in self._warmers:
+            try:
+                await fn()
+            except Exception:
+                logger.exception("Response cache warmer %s failed", fn.__name__)
+
+    async def get_or_build(self, key: tuple, build) -> dict:
+        version = current_version()
+
+        # Without a known dataset version nothing could invalidate the entry,
+        # so serialize fresh every time.
+        if version is None:
+            self.misses += 1
+            return make_entry(version, await build())
+
+        cache_key = (version,) + key
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = make_entry(version, await build())
+
+        # The version may have moved on while we were building
+        if version == current_version():
+            self._entries[cache_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "brotli": brotli is not None,
+        }
+
+
+def make_entry(version, payload) -> dict:
+    with span("serialization"):
+        body = orjson.dumps(payload)
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    # Weak: the identity, gzip and br bodies all carry this one tag
+    return {
+        "body": body,
+        "etag": f'W/"{version or "0"}-{digest}"',
+        "encoded": {},
+    }
+
+
+def encode(entry: dict, accept_encoding: str):
+    """Pick br/gzip per Accept-Encoding; compressed bodies are memoized."""
+    body = entry["body"]
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+
+    if brotli is not None and "br" in accepted:
+        encoding = "br"
+    elif "gzip" in accepted:
+        encoding = "gzip"
+    else:
+        return body, None
+
+    if encoding not in entry["encoded"]:
+        with span("serialization"):
+            if encoding == "br":
+                entry["encoded"][encoding] = brotli.compress(body, quality=5)
+            else:
+                entry["encoded"][encoding] = gzip.compress(body, compresslevel=6)
+
+    return entry["encoded"][encoding], encoding
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110), so a proxy that weakens the tag still gets 304s."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def cached_json(request: Request, key: tuple, build, cache: "ResponseCache" = None) -> Response:
+    """
+    Serve `await build()` as JSON through a response cache (the shared one
+    unless `cache` is given), answering 304 when the client's If-None-Match
+    matches.
+    """
+    cache = cache or response_cache
+    entry = await cache.get_or_build(key, build)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, entry["etag"]):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    content, encoding = encode(entry, request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+)
+
+# /recommend/ is keyed on the exact percentile, so nearly every request is a
+# new entry; kept apart so it cannot evict the warmed cities and filter bodies.
+recommend_cache = ResponseCache(
+    max_entries=int(os.getenv("RECOMMEND_CACHE_MAX_ENTRIES", "64"))
+)
+
+
+@on_version_change
+def _reset_response_cache(version):
+    response_cache.clear()
+    recommend_cache.clear()
+    if version is not None:
+        asyncio.get_running_loop().create_task(response_cache.warm())
@@ -0,0 +1,265 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from .schemas import GuidanceRequest
+from .recommendation import build_ai_guidance, build_guidance_analysis
+from .utils import is_admin_token
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Bounded in-process queue for long-running AI calls.
+
+    A fixed pool of worker tasks drains the queue in priority order (FIFO
+    within a priority). Finished jobs keep their result for `result_ttl`
+    seconds so clients can poll for it.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 100, result_ttl: int = 600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+
+        self._queue = asyncio.PriorityQueue(maxsize=max_pending)
+        self._order = itertools.count()
+        self._jobs = {}
+        self._tasks = []
+
+        # Exponentially weighted average job duration, used for Retry-After
+        self._avg_duration = 5.0
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    # ---------------- lifecycle ----------------
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---------------- internals ----------------
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] and now - job["finished_at"] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _retry_after(self) -> int:
+        waves = self._queue.qsize() / max(self.workers, 1)
+        return max(1, math.ceil(waves * self._avg_duration))
+
+    async def _worker(self):
+        while True:
+            _, _, job_id, fn = await self._queue.get()
+            job = self._jobs.get(job_id)
+
+            try:
+                if job is None:
+                    continue
+
+                job["status"] = "running"
+                job["started_at"] = time.time()
+
+                try:
+                    job["result"] = await fn()
+                    job["status"] = "completed"
+                    self.completed += 1
+                except HTTPException as e:
+                    job["error"] = e.detail
+                    job["status"] = "failed"
+                    self.failed += 1
+                except Exception as e:
+                    job["error"] = str(e)
+                    job["status"] = "failed"
+                    self.failed += 1
+
+                job["finished_at"] = time.time()
+                duration = job["finished_at"] - job["started_at"]
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+                job["done"].set()
+
+            finally:
+                self._queue.task_done()
+
+    # ---------------- public API ----------------
+
+    def submit(self, kind: str, fn, priority: str = "normal") -> dict:
+        self._purge_expired()
+
+        if self._queue.full():
+            self.rejected += 1
+            raise QueueFull(retry_after=self._retry_after())
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "priority": priority,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "done": asyncio.Event(),
+        }
+        self._jobs[job_id] = job
+        self._queue.put_nowait((PRIORITIES[priority], next(self._order), job_id, fn))
+        self.submitted += 1
+        return job
+
+    async def wait(self, job_id: str, timeout: float = 0):
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+
+        if job is not None and timeout > 0 and not job["done"].is_set():
+            try:
+                await asyncio.wait_for(job["done"].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return job
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "pending": self._queue.qsize(),
+            "max_pending": self.max_pending,
+            "tracked_jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_duration_seconds": round(self._avg_duration, 3),
+        }
+
+
+job_queue = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+    result_ttl=int(os.getenv("JOB_RESULT_TTL_SECONDS", "600")),
+)
+
+
+# ==============================
+# Router
+# ==============================
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def job_view(job: dict) -> dict:
+    view = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+    if job["status"] == "completed":
+        view["result"] = job["result"]
+    elif job["status"] == "failed":
+        view["error"] = job["error"]
+
+    return view
+
+
+def enqueue(kind: str, fn, priority: str, admin_token: Optional[str] = None) -> dict:
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"priority must be one of {', '.join(PRIORITIES)}"
+        )
+
+    # Anyone could ask for "high", which would make it meaningless
+    if priority == "high" and not is_admin_token(admin_token):
+        raise HTTPException(status_code=403, detail="priority=high requires the admin token")
+
+    try:
+        job = job_queue.submit(kind, fn, priority=priority)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many pending jobs, retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "poll_url": f"/jobs/{job['id']}"
+    }
+
+
+@router.post("/guidance/analyze", status_code=202)
+async def submit_guidance_analysis(
+    data: GuidanceRequest,
+    priority: str = "normal",
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    return enqueue(
+        "guidance/analyze",
+        lambda: build_guidance_analysis(data.student_type, data.answers),
+        priority,
+        x_admin_token
+    )
+
+
+@router.post("/recommend/guidance", status_code=202)
+async def submit_ai_guidance(
+    data: GuidanceRequest,
+    priority: str = "normal",
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    return enqueue(
+        "recommend/guidance",
+        lambda: build_ai_guidance(data.student_type, data.answers),
+        priority,
+        x_admin_token
+    )
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Poll a job; pass `wait` (seconds, max 60) to long-poll until it finishes."""
+    job = await job_queue.wait(job_id, timeout=min(max(wait, 0), 60))
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    return job_view(job)
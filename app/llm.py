@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import threading
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from .singleflight import SingleFlight, prompt_key
+from .profiling import span
+
+logger = logging.getLogger(__name__)
+
+# ==============================
+# Gemini Client (LAZY, SHARED)
+# ==============================
+# google.genai is only imported and the client only built on the first
+# Gemini call, so importing the app stays cheap and a missing key fails
+# that request instead of the whole process.
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise HTTPException(
+                        status_code=503,
+                        detail="GEMINI_API_KEY is not set in environment variables"
+                    )
+
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+
+    return _client
+
+
+class TokenUsage:
+    """Running Gemini token totals, overall and per purpose."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def record(self, purpose: str, usage: dict):
+        for key in (purpose, "all"):
+            bucket = self.totals.setdefault(key, {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+            })
+            bucket["calls"] += 1
+            for field in ("prompt_tokens", "output_tokens", "total_tokens"):
+                bucket[field] += usage[field] or 0
+
+    def stats(self) -> dict:
+        return self.totals
+
+
+token_usage = TokenUsage()
+
+
+class InFlightCalls:
+    """Gemini calls currently running, whichever route made them."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def stats(self) -> dict:
+        return {"current": self.current, "peak": self.peak}
+
+
+llm_calls = InFlightCalls()
+
+
+def usage_of(response) -> dict:
+    metadata = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", None),
+        "output_tokens": getattr(metadata, "candidates_token_count", None),
+        "total_tokens": getattr(metadata, "total_token_count", None),
+    }
+
+
+async def generate_content(contents, purpose: str = "other", **kwargs):
+    """Run a Gemini call in a worker thread so it does not block the event loop."""
+
+    def call():
+        return get_client().models.generate_content(
+            model=GEMINI_MODEL,
+            contents=contents,
+            **kwargs
+        )
+
+    llm_calls.current += 1
+    llm_calls.peak = max(llm_calls.peak, llm_calls.current)
+    try:
+        with span("llm"):
+            response = await asyncio.to_thread(call)
+    finally:
+        llm_calls.current -= 1
+    token_usage.record(purpose, usage_of(response))
+    return response
+
+
+# Identical prompts in flight at the same time share one Gemini call
+llm_flight = SingleFlight()
+
+
+async def generate_json(prompt: str, schema, max_output_tokens: int, purpose: str = "other") -> dict:
+    """
+    Ask Gemini for JSON constrained to the Pydantic model `schema`.
+
+    Returns {"data": <schema instance, or None if the reply did not
+    validate>, "text": <raw reply>, "usage": <token counts>}.
+    """
+    from google.genai import types
+
+    async def call():
+        response = await generate_content(
+            prompt,
+            purpose=purpose,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                max_output_tokens=max_output_tokens,
+            )
+        )
+
+        try:
+            data = schema.model_validate_json(response.text or "")
+        except ValidationError:
+            logger.warning("Gemini %s reply did not match %s", purpose, schema.__name__)
+            data = None
+
+        return {"data": data, "text": response.text, "usage": usage_of(response)}
+
+    key = prompt_key(f"{schema.__name__}:{max_output_tokens}:{prompt}")
+    return await llm_flight.do(key, call)
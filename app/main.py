@@ -1,19 +1,67 @@
+import logging
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+
+from app.startup import startup_profile
+
+# Import app modules one by one, dependencies first, so the startup profile
+# shows what each module costs on its own.
+startup_profile.import_modules([
+    "app.database",
+    "app.models",
+    "app.schema",
+    "app.schemas",
+    "app.utils",
+    "app.profiling",
+    "app.llm",
+    "app.dataset",
+    "app.catalogue",
+    "app.http_cache",
+    "app.snapshot",
+    "app.nearest",
+    "app.career_logic",
+    "app.comparisons",
+    "app.overload",
+    "app.auth",
+    "app.recommendation",
+    "app.counselor",
+    "app.taskkeeper",
+    "app.jobs",
+    "app.health",
+    "app.ratelimit",
+    "app.admin",
+])
+
 from app.auth import router as auth_router
-from app.database import engine, Base
+from app.database import engine
+from app.schema import ensure_schema
 from app.schemas import GuidanceRequest, GuidanceResponse
-from app.recommendation import get_ai_guidance
+from app.recommendation import build_guidance_analysis
 from app.recommendation import router as recommendation_router
-import os
 from app.counselor import router as counselor_router
 from app.taskkeeper import router as task_router
+from app.admin import router as admin_router
+from app.jobs import router as jobs_router, job_queue
+from app.health import router as health_router, health_monitor
+from app.ratelimit import RateLimitMiddleware
+from app.snapshot import snapshot_store
+from app.profiling import ProfilingMiddleware
+from app.comparisons import comparison_warmer
+from app.overload import overload
+from app.catalogue import catalogue_watcher
 
-from dotenv import load_dotenv
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="INNOMINDS Backend")
 
+# Added before CORS so 429 responses still carry CORS headers
+if os.getenv("RATE_LIMIT_ENABLED", "1") == "1":
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # React frontend
@@ -22,16 +70,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so a profiled request's timing covers every other middleware
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(auth_router)
 app.include_router(recommendation_router)
 app.include_router(counselor_router)
 app.include_router(task_router)
+app.include_router(admin_router)
+app.include_router(jobs_router)
+app.include_router(health_router)
 
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Map whatever snapshot is current; the health monitor swaps it when
+    # the DB reports a newer dataset version.
+    with startup_profile.step("college snapshot"):
+        snapshot_store.load()
+
+    with startup_profile.step("schema check"):
+        try:
+            await ensure_schema(engine)
+        except Exception as e:
+            # A catalogue node can serve college reads without Postgres;
+            # the health monitor applies the schema once it is reachable.
+            if catalogue_watcher is None:
+                raise
+            logger.warning("Schema check skipped, database unavailable: %s", e)
+            health_monitor.schema_ready = False
+
+    with startup_profile.step("job queue"):
+        await job_queue.start()
+
+    with startup_profile.step("health monitor"):
+        await health_monitor.start()
+
+    if os.getenv("OVERLOAD_ENABLED", "1") == "1":
+        with startup_profile.step("overload controller"):
+            await overload.start()
+
+    with startup_profile.step("comparison prefetch"):
+        await comparison_warmer.start()
+
+    startup_profile.log()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await overload.stop()
+    await comparison_warmer.stop()
+    await health_monitor.stop()
+    await job_queue.stop()
+
 
 @app.get("/")
 async def root():
@@ -40,48 +131,7 @@ async def root():
 
 @app.post("/guidance/analyze", response_model=GuidanceResponse)
 async def analyze_guidance(data: GuidanceRequest):
-    ai_text = await get_ai_guidance(
+    return await build_guidance_analysis(
         student_type=data.student_type,
         answers=data.answers
     )
-
-    return {
-        "roadmap": ai_text,
-        "chances": "High, based on interests and academic alignment",
-        "suggested_domains": [
-            "AI / Technology",
-            "Engineering",
-            "Research",
-            "Management"
-        ]
-    }
-
-@app.get("/health/gemini")
-async def gemini_health_check():
-    """Check if Gemini API is working"""
-    api_key = os.getenv("GEMINI_API_KEY")
-    
-    if not api_key:
-        return {
-            "status": "error",
-            "message": "GEMINI_API_KEY not set in environment variables"
-        }
-    
-    try:
-        # Try to list models
-        import google.genai as genai
-        client = genai.Client(api_key=api_key)
-        models = client.models.list()
-        
-        return {
-            "status": "healthy",
-            "api_key_set": True,
-            "available_models": [m.name for m in models],
-            "total_models": len(models)
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e),
-            "api_key_set": bool(api_key)
-        }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float,Boolean,Date
+from sqlalchemy import Column, Integer, String, Float,Boolean,Date, UniqueConstraint
 from .database import Base
 
 class User(Base):
@@ -12,6 +12,9 @@ class User(Base):
 
 class College(Base):
     __tablename__ = "colleges"
+    __table_args__ = (
+        UniqueConstraint("college_name", "branch_name", name="uq_college_branch"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     college_name = Column(String, nullable=False)
@@ -19,6 +22,7 @@ class College(Base):
     cutoff_percentile = Column(Float, nullable=True)
     fees = Column(Integer, nullable=False)
     city = Column(String, nullable=True)  # Add this field
+    content_hash = Column(String, nullable=True)  # set by load_csv.py for change detection
 
 
 
@@ -31,4 +35,21 @@ class Task(Base):
     category = Column(String, default="Study")
     due_date = Column(Date, nullable=False)
     completed = Column(Boolean, default=False)
-    overdue_notified = Column(Boolean, default=False)
\ No newline at end of file
+    overdue_notified = Column(Boolean, default=False)
+
+
+class AppMeta(Base):
+    __tablename__ = "app_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+
+
+class CachedComparison(Base):
+    """AI college comparisons shared by every worker (see app/comparisons.py)."""
+    __tablename__ = "compare_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of the comparison key
+    comparison = Column(String, nullable=False)  # JSON
+    created_at = Column(Float, nullable=False)
+    prefetched = Column(Boolean, default=False)
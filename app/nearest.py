@@ -0,0 +1,153 @@
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from .dataset import current_version, on_version_change
+from .models import College
+from .snapshot import snapshot_store
+
+logger = logging.getLogger(__name__)
+
+# Weighted distance: one percentile point weighs PERCENTILE_WEIGHT, and
+# FEES_UNIT rupees of fee difference weigh FEES_WEIGHT.
+PERCENTILE_WEIGHT = float(os.getenv("NEAREST_PERCENTILE_WEIGHT", "1.0"))
+FEES_WEIGHT = float(os.getenv("NEAREST_FEES_WEIGHT", "1.0"))
+FEES_UNIT = float(os.getenv("NEAREST_FEES_UNIT", "10000"))
+
+
+def scale(percentiles, fees) -> np.ndarray:
+    return np.column_stack([
+        np.asarray(percentiles, dtype=np.float64) * PERCENTILE_WEIGHT,
+        np.asarray(fees, dtype=np.float64) / FEES_UNIT * FEES_WEIGHT,
+    ])
+
+
+class CollegeIndex:
+    """KD-tree over (cutoff, fees) for one dataset version and filter."""
+
+    def __init__(self, rows: list):
+        from sklearn.neighbors import KDTree
+
+        # Colleges without a published cutoff have no position to measure
+        self.rows = [row for row in rows if row[3] is not None]
+        self.tree = None
+
+        if self.rows:
+            self.tree = KDTree(scale(
+                [row[3] for row in self.rows],
+                [row[4] for row in self.rows],
+            ))
+
+    def query(self, percentile: float, budget: int, k: int) -> list:
+        if self.tree is None:
+            return []
+
+        k = min(k, len(self.rows))
+        distances, indices = self.tree.query(scale([percentile], [budget]), k=k)
+        return [
+            (self.rows[i], distance)
+            for i, distance in zip(indices[0].tolist(), distances[0].tolist())
+        ]
+
+
+class NearestIndexCache:
+    """
+    Indexes built lazily per (dataset version, city, branches) and reused
+    until the dataset version changes.
+
+    Filters are resolved against the branch and city names in the data
+    first, so the number of distinct indexes is bounded by the catalogue,
+    not by whatever strings clients send.
+    """
+
+    def __init__(self, max_indexes: int = 64):
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._rows = None
+        self._branches = None
+        self._cities = None
+
+        self.builds = 0
+        self.hits = 0
+
+    def clear(self):
+        self._indexes.clear()
+        self._rows = None
+        self._branches = None
+        self._cities = None
+
+    async def _all_rows(self, db: AsyncSession) -> list:
+        if self._rows is None:
+            snapshot = snapshot_store.current
+            if snapshot is not None:
+                self._rows = snapshot.rows(snapshot.mask())
+            else:
+                result = await db.execute(select(
+                    College.id,
+                    College.college_name,
+                    College.branch_name,
+                    College.cutoff_percentile,
+                    College.fees,
+                    College.city
+                ))
+                self._rows = result.all()
+            self._branches = sorted({row[2] for row in self._rows if row[2]})
+            self._cities = {row[5] for row in self._rows if row[5]}
+        return self._rows
+
+    async def resolve_branch(self, db: AsyncSession, branch: str) -> tuple:
+        """Known branch names containing `branch` (case-insensitive); empty if none."""
+        await self._all_rows(db)
+        needle = branch.strip().lower()
+        return tuple(name for name in self._branches if needle in name.lower())
+
+    async def get(self, db: AsyncSession, city=None, branches: tuple = None) -> CollegeIndex:
+        """Index for `city` and `branches` (from resolve_branch); None means unfiltered."""
+        await self._all_rows(db)
+        if city and city not in self._cities:
+            # Nothing can match; not worth an index slot
+            return CollegeIndex([])
+
+        key = (current_version(), city, branches)
+
+        index = self._indexes.get(key)
+        if index is not None:
+            self._indexes.move_to_end(key)
+            self.hits += 1
+            return index
+
+        rows = await self._all_rows(db)
+        if city:
+            rows = [row for row in rows if row[5] == city]
+        if branches:
+            wanted = set(branches)
+            rows = [row for row in rows if row[2] in wanted]
+
+        index = CollegeIndex(rows)
+        self.builds += 1
+
+        self._indexes[key] = index
+        while len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+
+        return index
+
+    def stats(self) -> dict:
+        return {
+            "indexes": len(self._indexes),
+            "max_indexes": self.max_indexes,
+            "builds": self.builds,
+            "hits": self.hits,
+        }
+
+
+nearest_indexes = NearestIndexCache()
+
+
+@on_version_change
+def _reset_nearest_indexes(version):
+    nearest_indexes.clear()
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+
+from fastapi import HTTPException
+
+from .database import engine
+from .llm import llm_calls
+
+logger = logging.getLogger(__name__)
+
+NORMAL = "normal"
+DEGRADED = "degraded"
+
+
+class OverloadController:
+    """
+    Switches the service into a degraded mode when the event loop lags, the
+    DB pool makes callers wait, or Gemini calls pile up.
+
+    While degraded, AI endpoints answer from defaults and caches instead of
+    calling Gemini, /recommend/ stays off the DB, and low-priority routes
+    are shed with 503. The mode is entered once any signal has been over its
+    threshold for `trip_samples` consecutive samples (a single stall, such
+    as a slow import, does not count) and left only after every signal has
+    stayed below `recover_ratio` of its threshold for `recover_seconds`, so
+    it does not flap at the boundary.
+    """
+
+    def __init__(
+        self,
+        thresholds: dict,
+        interval: float = 1.0,
+        trip_samples: int = 3,
+        recover_seconds: float = 30.0,
+        recover_ratio: float = 0.5,
+        retry_after: int = 30
+    ):
+        # thresholds: signal name -> value that trips degraded mode
+        self.thresholds = thresholds
+        self.interval = interval
+        self.trip_samples = trip_samples
+        self.recover_seconds = recover_seconds
+        self.recover_ratio = recover_ratio
+        self.retry_after = retry_after
+
+        self.mode = NORMAL
+        self.forced = None
+        self.signals = {name: 0.0 for name in thresholds}
+        self.tripped = []
+
+        self._task = None
+        self._since = time.time()
+        self._calm_since = None
+        self._hot_samples = 0
+        self._time_in_mode = Counter()
+
+        self.transitions = Counter()
+        self.history = deque(maxlen=20)
+        self.shed = 0
+        self.degraded_responses = Counter()
+
+    @property
+    def degraded(self) -> bool:
+        return (self.forced or self.mode) == DEGRADED
+
+    # ---------------- signals ----------------
+
+    async def _db_wait(self) -> float:
+        # Acquiring (and immediately returning) a pooled connection measures
+        # exactly what a request would wait for. Capped so a saturated pool
+        # cannot stall the sampler.
+        cap = self.thresholds["db_wait_ms"] * 2 / 1000
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._acquire(), timeout=cap)
+        except asyncio.TimeoutError:
+            return cap * 1000
+        except Exception as e:
+            logger.debug("DB wait probe failed: %s", e)
+        return (time.perf_counter() - start) * 1000
+
+    async def _acquire(self):
+        async with engine.connect():
+            pass
+
+    def _llm_queue_depth(self) -> int:
+        # Every running Gemini call (counselor chat included) plus queued jobs.
+        # Imported here: jobs imports recommendation, which imports this module
+        from .jobs import job_queue
+
+        return llm_calls.current + job_queue.stats()["pending"]
+
+    async def sample(self, loop_lag_ms: float):
+        self.signals = {
+            "loop_lag_ms": round(loop_lag_ms, 2),
+            "db_wait_ms": round(await self._db_wait(), 2),
+            "llm_queue_depth": self._llm_queue_depth(),
+        }
+        self.update(time.time())
+
+    # ---------------- mode ----------------
+
+    def update(self, now: float):
+        self.tripped = [
+            name for name, value in self.signals.items()
+            if value >= self.thresholds[name]
+        ]
+
+        if self.tripped:
+            self._calm_since = None
+            self._hot_samples += 1
+            if self.mode == NORMAL and self._hot_samples >= self.trip_samples:
+                self._switch(DEGRADED, now, ", ".join(self.tripped))
+            return
+
+        self._hot_samples = 0
+        calm = all(
+            value < self.thresholds[name] * self.recover_ratio
+            for name, value in self.signals.items()
+        )
+        if not calm:
+            self._calm_since = None
+            return
+
+        if self._calm_since is None:
+            self._calm_since = now
+        if self.mode == DEGRADED and now - self._calm_since >= self.recover_seconds:
+            self._switch(NORMAL, now, "recovered")
+
+    def _switch(self, mode: str, now: float, reason: str):
+        previous = self.mode
+        self._time_in_mode[previous] += now - self._since
+        self.mode = mode
+        self._since = now
+
+        self.transitions[f"{previous}->{mode}"] += 1
+        self.history.append({
+            "at": now,
+            "from": previous,
+            "to": mode,
+            "reason": reason,
+            "signals": dict(self.signals),
+        })
+
+        log = logger.warning if mode == DEGRADED else logger.info
+        log("Service mode %s -> %s (%s) signals=%s", previous, mode, reason, self.signals)
+
+    def force(self, mode):
+        """Pin the mode (NORMAL or DEGRADED), or pass None to go back to automatic."""
+        if mode not in (None, NORMAL, DEGRADED):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.forced = mode
+        logger.warning("Service mode override set to %s", mode or "auto")
+
+    # ---------------- hooks for endpoints ----------------
+
+    def note_degraded(self, endpoint: str):
+        self.degraded_responses[endpoint] += 1
+
+    def unavailable(self, detail: str = "Service is under heavy load, please retry shortly") -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    # ---------------- background loop ----------------
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - start - self.interval) * 1000
+            try:
+                await self.sample(lag_ms)
+            except Exception:
+                logger.exception("Overload sample failed")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        now = time.time()
+        time_in_mode = dict(self._time_in_mode)
+        time_in_mode[self.mode] = time_in_mode.get(self.mode, 0.0) + now - self._since
+
+        return {
+            "mode": DEGRADED if self.degraded else NORMAL,
+            "automatic_mode": self.mode,
+            "forced": self.forced,
+            "since": self._since,
+            "signals": self.signals,
+            "thresholds": self.thresholds,
+            "tripped": self.tripped,
+            "transitions": dict(self.transitions),
+            "seconds_in_mode": {mode: round(s, 1) for mode, s in time_in_mode.items()},
+            "shed": self.shed,
+            "degraded_responses": dict(self.degraded_responses),
+            "history": list(self.history),
+        }
+
+
+overload = OverloadController(
+    thresholds={
+        "loop_lag_ms": float(os.getenv("OVERLOAD_LOOP_LAG_MS", "200")),
+        "db_wait_ms": float(os.getenv("OVERLOAD_DB_WAIT_MS", "500")),
+        "llm_queue_depth": int(os.getenv("OVERLOAD_LLM_QUEUE_DEPTH", "50")),
+    },
+    interval=float(os.getenv("OVERLOAD_SAMPLE_SECONDS", "1")),
+    trip_samples=int(os.getenv("OVERLOAD_TRIP_SAMPLES", "3")),
+    recover_seconds=float(os.getenv("OVERLOAD_RECOVER_SECONDS", "30")),
+    recover_ratio=float(os.getenv("OVERLOAD_RECOVER_RATIO", "0.5")),
+    retry_after=int(os.getenv("OVERLOAD_RETRY_AFTER", "30")),
+)
+
+
+def shed_when_overloaded():
+    """Router dependency for low-priority routes: 503 while degraded."""
+    if overload.degraded:
+        overload.shed += 1
+        raise overload.unavailable()
@@ -0,0 +1,208 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+
+from .database import catalogue_engine, engine
+from .utils import is_admin_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+
+# Set only while a profiled request is running; every hook below bails out
+# on a single ContextVar.get() otherwise.
+_current_profile = ContextVar("request_profile", default=None)
+
+# cProfile hooks the whole thread, so only one request is profiled at a time
+_profiler_busy = False
+
+
+class RequestProfile:
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name: str, seconds: float):
+        total, count = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds, count + 1)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def breakdown(self) -> dict:
+        total = self.elapsed()
+        spans = {
+            name: {"ms": round(seconds * 1000, 3), "count": count}
+            for name, (seconds, count) in self.spans.items()
+        }
+        accounted = sum(seconds for seconds, _ in self.spans.values())
+        spans["other"] = {"ms": round(max(total - accounted, 0) * 1000, 3), "count": 1}
+        spans["total"] = {"ms": round(total * 1000, 3), "count": 1}
+        return spans
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f'{name};dur={span["ms"]};desc="{span["count"]}x"'
+            for name, span in self.breakdown().items()
+        )
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current request's profile, if one is active."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+# ---------------- DB spans ----------------
+
+def instrument_engine(async_engine):
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        starts = conn.info.get("profile_start")
+        if profile is not None and starts:
+            profile.add("db", time.perf_counter() - starts.pop())
+
+
+instrument_engine(engine)
+if catalogue_engine is not engine:
+    instrument_engine(catalogue_engine)
+
+
+# ---------------- middleware ----------------
+
+def header(scope, name: bytes) -> bytes:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value
+    return None
+
+
+def wants_profile(scope) -> bool:
+    # Unflagged requests (nearly all of them) cost one scan of the raw header
+    # list and a substring test on the query string; nothing is decoded or
+    # copied, and the admin token is only read once a flag is present.
+    flagged = header(scope, b"x-profile") == b"1"
+
+    if not flagged:
+        query_string = scope.get("query_string", b"")
+        if b"__profile" not in query_string:
+            return False
+        flagged = parse_qs(query_string.decode()).get("__profile") == ["1"]
+        if not flagged:
+            return False
+
+    token = header(scope, b"x-admin-token") or b""
+    return is_admin_token(token.decode())
+
+
+def write_profile(profile: RequestProfile, profiler, status: int):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", profile.path).strip("_") or "root"
+    base = PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{profile.method}-{slug}-{profile.id}"
+
+    summary = {
+        "id": profile.id,
+        "method": profile.method,
+        "path": profile.path,
+        "status": status,
+        "spans": profile.breakdown(),
+    }
+
+    if profiler is not None:
+        profiler.dump_stats(f"{base}.prof")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+        summary["top_functions"] = stream.getvalue()
+
+    with open(f"{base}.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    return base
+
+
+class ProfilingMiddleware:
+    """
+    Profiles one request when it carries `X-Profile: 1` (or `?__profile=1`)
+    together with a valid `X-Admin-Token`.
+
+    The response gets a Server-Timing breakdown of db / llm / hashing /
+    serialization spans, and the cProfile dump plus a JSON summary are
+    written to PROFILE_DIR. Unflagged requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        global _profiler_busy
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        status = 500
+
+        profiler = None
+        if not _profiler_busy:
+            _profiler_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _profiler_busy = False
+            _current_profile.reset(token)
+
+            try:
+                path = write_profile(profile, profiler, status)
+                logger.info("Profiled %s %s -> %s", profile.method, profile.path, path)
+            except Exception:
+                logger.exception("Could not write request profile")
@@ -0,0 +1,280 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# Bucket stores
+# ==============================
+
+class MemoryBucketStore:
+    """
+    Token buckets kept in this process.
+
+    Each active key costs one small list. Keys are ordered by last use, so
+    idle buckets are evicted from the front of the OrderedDict in amortized
+    O(1) on every call.
+    """
+
+    def __init__(self, idle_ttl: int = 600):
+        self.idle_ttl = idle_ttl
+        self._buckets = OrderedDict()
+
+    def _evict_idle(self, now: float):
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] <= self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    async def take(self, key: str, rate: float, capacity: int, now: float):
+        self._evict_idle(now)
+
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [float(capacity), now]
+
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        bucket[0] = tokens
+        bucket[1] = now
+        self._buckets[key] = bucket
+        return allowed, tokens
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every uvicorn worker through Redis.
+
+    The refill-and-take step runs as one Lua script so it is atomic across
+    workers; idle keys expire on their own. If Redis is unreachable (or
+    slower than `timeout` seconds), requests use the in-process store for
+    the next `backoff` seconds instead of each waiting on Redis again, and
+    the outage is logged once per backoff window.
+    """
+
+    def __init__(self, url: str, idle_ttl: int = 600, timeout: float = 0.25, backoff: float = 30.0):
+        import redis.asyncio as redis
+
+        self.idle_ttl = idle_ttl
+        self.backoff = backoff
+        self._redis = redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._script = self._redis.register_script(_REDIS_TAKE)
+        self._fallback = MemoryBucketStore(idle_ttl=idle_ttl)
+        self._down_until = 0.0
+        self.failures = 0
+
+    async def take(self, key: str, rate: float, capacity: int, now: float):
+        if now < self._down_until:
+            return await self._fallback.take(key, rate, capacity, now)
+
+        try:
+            allowed, tokens = await self._script(
+                keys=[f"ratelimit:{key}"],
+                args=[rate, capacity, now, self.idle_ttl]
+            )
+            return bool(allowed), float(tokens)
+        except Exception as e:
+            self.failures += 1
+            self._down_until = now + self.backoff
+            logger.warning(
+                "Rate limit backend unavailable, using local buckets for %ss: %s", self.backoff, e
+            )
+            return await self._fallback.take(key, rate, capacity, now)
+
+    def size(self) -> int:
+        return self._fallback.size()
+
+
+# ==============================
+# Limiter
+# ==============================
+
+# Route classes: Gemini-backed routes get a much smaller budget than DB routes
+LLM_ROUTES = (
+    ("POST", "/counselor/chat"),
+    ("POST", "/recommend/guidance"),
+    ("POST", "/recommend/compare"),
+    ("POST", "/guidance/analyze"),
+    ("POST", "/jobs/"),
+)
+
+DB_ROUTES = (
+    ("*", "/recommend/"),
+    ("*", "/auth/"),
+    ("*", "/tasks"),
+    # Job polls, so long-polls cannot hold sockets unthrottled
+    ("GET", "/jobs/"),
+)
+
+
+def classify(method: str, path: str):
+    for route_method, prefix in LLM_ROUTES:
+        if path.startswith(prefix) and route_method in ("*", method):
+            return "llm"
+    for route_method, prefix in DB_ROUTES:
+        if path.startswith(prefix) and route_method in ("*", method):
+            return "db"
+    return None
+
+
+class RateLimiter:
+
+    def __init__(self, budgets: dict, store, trust_proxy: bool = False, trust_user_header: bool = False):
+        # budgets: route class -> (tokens per minute, burst capacity)
+        self.budgets = budgets
+        self.store = store
+        self.trust_proxy = trust_proxy
+        # X-User-Id is client-controlled; only an authenticating proxy that
+        # sets it (and strips it from clients) makes it safe to charge.
+        self.trust_user_header = trust_user_header
+
+        self.allowed = 0
+        self.limited = 0
+
+    def client_ip(self, request: Request) -> str:
+        if self.trust_proxy:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    async def check(self, request: Request, route_class: str):
+        """Take one token from every bucket this request is charged to."""
+        per_minute, capacity = self.budgets[route_class]
+        rate = per_minute / 60.0
+        now = time.time()
+
+        keys = [f"{route_class}:ip:{self.client_ip(request)}"]
+        user_id = request.headers.get("x-user-id") if self.trust_user_header else None
+        if user_id:
+            keys.append(f"{route_class}:user:{user_id}")
+
+        allowed = True
+        remaining = float(capacity)
+        for key in keys:
+            key_allowed, tokens = await self.store.take(key, rate, capacity, now)
+            allowed = allowed and key_allowed
+            remaining = min(remaining, tokens)
+
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+
+        headers = {
+            "RateLimit-Limit": str(capacity),
+            "RateLimit-Remaining": str(int(remaining)),
+            "RateLimit-Reset": str(math.ceil((capacity - remaining) / rate)),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil((1 - remaining) / rate)))
+
+        return allowed, headers
+
+    def stats(self) -> dict:
+        return {
+            "budgets": {
+                name: {"per_minute": per_minute, "burst": burst}
+                for name, (per_minute, burst) in self.budgets.items()
+            },
+            "active_keys": self.store.size(),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def build_rate_limiter() -> RateLimiter:
+    idle_ttl = int(os.getenv("RATE_LIMIT_IDLE_SECONDS", "600"))
+    redis_url = os.getenv("RATE_LIMIT_REDIS_URL")
+
+    if redis_url:
+        store = RedisBucketStore(
+            redis_url,
+            idle_ttl=idle_ttl,
+            timeout=float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25")),
+            backoff=float(os.getenv("RATE_LIMIT_REDIS_BACKOFF_SECONDS", "30"))
+        )
+    else:
+        store = MemoryBucketStore(idle_ttl=idle_ttl)
+
+    budgets = {
+        "llm": (
+            float(os.getenv("RATE_LIMIT_LLM_PER_MINUTE", "10")),
+            int(os.getenv("RATE_LIMIT_LLM_BURST", "5")),
+        ),
+        "db": (
+            float(os.getenv("RATE_LIMIT_DB_PER_MINUTE", "120")),
+            int(os.getenv("RATE_LIMIT_DB_BURST", "30")),
+        ),
+    }
+
+    return RateLimiter(
+        budgets,
+        store,
+        trust_proxy=os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1",
+        trust_user_header=os.getenv("RATE_LIMIT_TRUST_USER_HEADER", "0") == "1"
+    )
+
+
+rate_limiter = build_rate_limiter()
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+
+    async def dispatch(self, request: Request, call_next):
+        route_class = classify(request.method, request.url.path)
+
+        if route_class is None:
+            return await call_next(request)
+
+        allowed, headers = await rate_limiter.check(request, route_class)
+
+        if not allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded"},
+                headers=headers
+            )
+
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
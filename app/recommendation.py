@@ -1,29 +1,24 @@
 # recommendation.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import or_, and_
 from pydantic import BaseModel
 import json
 import os
-from google import genai
+import orjson
 from typing import Optional
 
-from .database import get_db
+from .database import get_catalogue_db, CatalogueSessionLocal
 from .models import College
-from .schemas import RecommendationRequest
-from .career_logic import recommend_careers, build_guidance_prompt
-
-# ==============================
-# Gemini Client (SAFE INIT)
-# ==============================
-
-GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_KEY:
-    raise RuntimeError("GEMINI_API_KEY is not set in environment variables")
-
-client = genai.Client(api_key=GEMINI_KEY)
+from .schemas import RecommendationRequest, NearestCollegesRequest, AIGuidance
+from .career_logic import career_rules, recommend_careers, build_guidance_prompt
+from .llm import generate_json
+from .http_cache import cached_json, recommend_cache, response_cache
+from .snapshot import snapshot_store
+from .nearest import nearest_indexes
+from .comparisons import comparison_key, college_info, cached_comparison, get_comparison, popular_comparisons
+from .overload import overload
 
 # ==============================
 # Router
@@ -44,36 +39,55 @@ class GuidanceRequest(BaseModel):
 # 1️⃣ Career + College Recommendation
 # ==============================
 
-@router.post("/")
-async def recommend(
-    data: RecommendationRequest,
-    db: AsyncSession = Depends(get_db)
-):
+async def query_eligible_colleges(db: AsyncSession, data: RecommendationRequest) -> dict:
 
     careers = recommend_careers(data.exam, data.percentile)
 
-    lower_fee = data.max_fees - 50000
-
-    query = select(College).where(
-        College.cutoff_percentile.isnot(None),  # ✅ avoid NULL issue
-        College.cutoff_percentile <= data.percentile,
-        College.fees >= lower_fee,
-        College.fees <= data.max_fees
-    )
-
-    result = await db.execute(query)
-    colleges = result.scalars().all()
-
-    eligible_colleges = []
-
-    for c in colleges:
-        eligible_colleges.append({
-            "college_name": c.college_name,
-            "branch_name": c.branch_name,
-            "cutoff_percentile": c.cutoff_percentile,
-            "fees": c.fees,
+    # Without a budget there is no fee window to apply
+    lower_fee = data.max_fees - 50000 if data.max_fees is not None else None
+
+    snapshot = snapshot_store.current
+
+    if snapshot is not None:
+        # Served from the memory-mapped snapshot, no DB round trip
+        rows = [
+            row[1:5]
+            for row in snapshot.rows(snapshot.mask(
+                max_percentile=data.percentile,
+                min_fees=lower_fee,
+                max_fees=data.max_fees
+            ))
+        ]
+    else:
+        conditions = [
+            College.cutoff_percentile.isnot(None),  # ✅ avoid NULL issue
+            College.cutoff_percentile <= data.percentile
+        ]
+
+        if data.max_fees is not None:
+            conditions.append(College.fees >= lower_fee)
+            conditions.append(College.fees <= data.max_fees)
+
+        query = select(
+            College.college_name,
+            College.branch_name,
+            College.cutoff_percentile,
+            College.fees
+        ).where(*conditions)
+
+        result = await db.execute(query)
+        rows = result.all()
+
+    eligible_colleges = [
+        {
+            "college_name": college_name,
+            "branch_name": branch_name,
+            "cutoff_percentile": cutoff_percentile,
+            "fees": fees,
             "status": "Eligible"
-        })
+        }
+        for college_name, branch_name, cutoff_percentile, fees in rows
+    ]
 
     return {
         "suggested_careers": careers,
@@ -81,33 +95,100 @@ async def recommend(
     }
 
 
+@router.post("/")
+async def recommend(
+    data: RecommendationRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_catalogue_db)
+):
+    if overload.degraded and snapshot_store.current is None:
+        # Stay off the DB: rule-based careers only, and never cached
+        overload.note_degraded("recommend")
+        return {
+            "suggested_careers": recommend_careers(data.exam, data.percentile),
+            "eligible_colleges": [],
+            "degraded": True
+        }
+
+    return await cached_json(
+        request,
+        # The rules generation is checked first: the cached body embeds
+        # careers, and a hit would otherwise never look at the rules file
+        ("recommend", data.exam, data.percentile, data.max_fees, career_rules.check()),
+        lambda: query_eligible_colleges(db, data),
+        cache=recommend_cache
+    )
+
+
 # ==============================
 # 2️⃣ AI GUIDANCE
 # ==============================
 
-@router.post("/guidance")
-async def get_ai_guidance(request: GuidanceRequest):
-    try:
-        prompt = build_guidance_prompt(request.student_type, request.answers)
+GUIDANCE_MAX_OUTPUT_TOKENS = int(os.getenv("GUIDANCE_MAX_OUTPUT_TOKENS", "1024"))
 
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            contents=prompt
-        )
 
-        ai_text = response.text
+async def build_ai_guidance(student_type: str, answers: dict, include_raw: bool = False) -> dict:
+    if overload.degraded:
+        overload.note_degraded("guidance")
+        return {
+            "student_type": student_type,
+            **default_guidance(student_type),
+            "usage": None,
+            "degraded": True
+        }
 
-        parsed_response = parse_ai_response(ai_text, request.student_type)
+    prompt = build_guidance_prompt(student_type, answers)
 
-        return {
-            "student_type": request.student_type,
-            "strengths": parsed_response.get("strengths", []),
-            "suggested_domains": parsed_response.get("suggested_domains", []),
-            "roadmap": parsed_response.get("roadmap", ""),
-            "chances": parsed_response.get("chances", "Good potential based on your profile"),
-            "raw_ai_response": ai_text
+    result = await generate_json(
+        prompt,
+        AIGuidance,
+        max_output_tokens=GUIDANCE_MAX_OUTPUT_TOKENS,
+        purpose="guidance"
+    )
+    guidance = result["data"]
+
+    if guidance is not None:
+        defaults = default_guidance(student_type)
+        parsed_response = {
+            "strengths": guidance.strengths[:3] or defaults["strengths"],
+            "suggested_domains": guidance.suggested_domains[:4] or defaults["suggested_domains"],
+            "roadmap": "\n".join(guidance.roadmap[:4]) or defaults["roadmap"],
+            "chances": guidance.chances or defaults["chances"]
         }
+    else:
+        # Truncated or off-schema reply: fall back to the text heuristics
+        parsed_response = parse_ai_response(result["text"] or "", student_type)
+
+    payload = {
+        "student_type": student_type,
+        **parsed_response,
+        "usage": result["usage"]
+    }
+
+    if include_raw:
+        payload["raw_ai_response"] = result["text"]
+
+    return payload
+
 
+async def build_guidance_analysis(student_type: str, answers: dict) -> dict:
+    """Payload for /guidance/analyze"""
+    guidance = await build_ai_guidance(student_type, answers)
+
+    return {
+        "roadmap": guidance["roadmap"],
+        "chances": guidance["chances"],
+        "suggested_domains": guidance["suggested_domains"]
+    }
+
+
+@router.post("/guidance")
+async def get_ai_guidance(request: GuidanceRequest, include_raw: bool = False):
+    try:
+        return await build_ai_guidance(request.student_type, request.answers, include_raw)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -119,28 +200,36 @@ async def get_ai_guidance(request: GuidanceRequest):
 # AI RESPONSE PARSER
 # ==============================
 
+DEFAULT_RESPONSES = {
+    "school": {
+        "strengths": ["Analytical Thinking", "Creative Problem Solving", "Strong Foundation in Core Subjects"],
+        "suggested_domains": ["STEM Fields", "Business Management", "Creative Arts", "Social Sciences"],
+        "roadmap": "Focus on building strong fundamentals\nParticipate in activities\nResearch career options\nPlan strategically",
+        "chances": "Good potential based on your profile"
+    },
+    "senior": {
+        "strengths": ["Specialized Knowledge", "Goal Orientation", "Academic Discipline"],
+        "suggested_domains": ["Engineering", "Medical Sciences", "Commerce & Finance", "Humanities Research"],
+        "roadmap": "Excel in board exams\nPrepare for entrances\nBuild strong profile\nResearch colleges",
+        "chances": "Good potential based on your profile"
+    },
+    "engineering": {
+        "strengths": ["Technical Skills", "Project Experience", "Specialized Knowledge"],
+        "suggested_domains": ["Software Development", "Data Science", "Core Engineering", "Product Management"],
+        "roadmap": "Enhance skills\nBuild portfolio\nPrepare placements\nNetwork professionally",
+        "chances": "Good potential based on your profile"
+    }
+}
+
+
+def default_guidance(student_type: str) -> dict:
+    return DEFAULT_RESPONSES.get(student_type, DEFAULT_RESPONSES["school"])
+
+
 def parse_ai_response(ai_text: str, student_type: str) -> dict:
+    """Line heuristics for free-text replies; only used when JSON output fails."""
 
-    default_responses = {
-        "school": {
-            "strengths": ["Analytical Thinking", "Creative Problem Solving", "Strong Foundation in Core Subjects"],
-            "suggested_domains": ["STEM Fields", "Business Management", "Creative Arts", "Social Sciences"],
-            "roadmap": "Focus on building strong fundamentals\nParticipate in activities\nResearch career options\nPlan strategically",
-            "chances": "Good potential based on your profile"
-        },
-        "senior": {
-            "strengths": ["Specialized Knowledge", "Goal Orientation", "Academic Discipline"],
-            "suggested_domains": ["Engineering", "Medical Sciences", "Commerce & Finance", "Humanities Research"],
-            "roadmap": "Excel in board exams\nPrepare for entrances\nBuild strong profile\nResearch colleges",
-            "chances": "Good potential based on your profile"
-        },
-        "engineering": {
-            "strengths": ["Technical Skills", "Project Experience", "Specialized Knowledge"],
-            "suggested_domains": ["Software Development", "Data Science", "Core Engineering", "Product Management"],
-            "roadmap": "Enhance skills\nBuild portfolio\nPrepare placements\nNetwork professionally",
-            "chances": "Good potential based on your profile"
-        }
-    }
+    default_responses = DEFAULT_RESPONSES
 
     try:
         strengths = []
@@ -182,52 +271,67 @@ def parse_ai_response(ai_text: str, student_type: str) -> dict:
 # 3️⃣ FILTER COLLEGES
 # ==============================
 
-@router.get("/colleges/filter")
-async def filter_colleges(
-    min_percentile: Optional[float] = 0,
-    max_percentile: Optional[float] = 100,
-    city: Optional[str] = None,
-    min_fees: Optional[int] = None,
-    max_fees: Optional[int] = None,
-    db: AsyncSession = Depends(get_db)
-):
-
-    query = select(College)
-    conditions = []
-
-    if min_percentile is not None:
-        conditions.append(College.cutoff_percentile.isnot(None))
-        conditions.append(College.cutoff_percentile >= min_percentile)
+async def query_filtered_colleges(
+    db: AsyncSession,
+    min_percentile: Optional[float],
+    max_percentile: Optional[float],
+    city: Optional[str],
+    min_fees: Optional[int],
+    max_fees: Optional[int]
+) -> dict:
+
+    snapshot = snapshot_store.current
+
+    if snapshot is not None:
+        # Served from the memory-mapped snapshot, no DB round trip
+        rows = snapshot.rows(snapshot.mask(
+            min_percentile, max_percentile, city, min_fees, max_fees
+        ))
+    else:
+        # Plain column rows are much cheaper to build than ORM entities
+        query = select(
+            College.id,
+            College.college_name,
+            College.branch_name,
+            College.cutoff_percentile,
+            College.fees,
+            College.city
+        )
+        conditions = []
 
-    if max_percentile is not None:
-        conditions.append(College.cutoff_percentile <= max_percentile)
+        if min_percentile is not None:
+            conditions.append(College.cutoff_percentile.isnot(None))
+            conditions.append(College.cutoff_percentile >= min_percentile)
 
-    if city and city != "All Cities":
-        conditions.append(College.city == city)
+        if max_percentile is not None:
+            conditions.append(College.cutoff_percentile <= max_percentile)
 
-    if min_fees is not None:
-        conditions.append(College.fees >= min_fees)
+        if city:
+            conditions.append(College.city == city)
 
-    if max_fees is not None:
-        conditions.append(College.fees <= max_fees)
+        if min_fees is not None:
+            conditions.append(College.fees >= min_fees)
 
-    if conditions:
-        query = query.where(and_(*conditions))
+        if max_fees is not None:
+            conditions.append(College.fees <= max_fees)
 
-    result = await db.execute(query)
-    colleges = result.scalars().all()
+        if conditions:
+            query = query.where(and_(*conditions))
 
-    college_list = []
+        result = await db.execute(query)
+        rows = result.all()
 
-    for college in colleges:
-        college_list.append({
-            "id": college.id,
-            "name": college.college_name,
-            "branch": college.branch_name,
-            "cutoff": college.cutoff_percentile,
-            "fees": college.fees,
-            "city": college.city
-        })
+    college_list = [
+        {
+            "id": college_id,
+            "name": name,
+            "branch": branch,
+            "cutoff": cutoff,
+            "fees": fees,
+            "city": college_city
+        }
+        for college_id, name, branch, cutoff, fees, college_city in rows
+    ]
 
     return {
         "count": len(college_list),
@@ -235,12 +339,11 @@ async def filter_colleges(
     }
 
 
-# ==============================
-# 4️⃣ GET CITIES
-# ==============================
+async def query_cities(db: AsyncSession) -> dict:
 
-@router.get("/cities")
-async def get_cities(db: AsyncSession = Depends(get_db)):
+    snapshot = snapshot_store.current
+    if snapshot is not None:
+        return {"cities": ["All Cities"] + snapshot.cities()}
 
     query = select(College.city).distinct().where(College.city.isnot(None))
     result = await db.execute(query)
@@ -249,6 +352,100 @@ async def get_cities(db: AsyncSession = Depends(get_db)):
     return {"cities": ["All Cities"] + [city for city in cities if city]}
 
 
+def normalize_city(city: Optional[str]) -> Optional[str]:
+    return None if not city or city == "All Cities" else city
+
+
+@router.get("/colleges/filter")
+async def filter_colleges(
+    request: Request,
+    min_percentile: Optional[float] = 0,
+    max_percentile: Optional[float] = 100,
+    city: Optional[str] = None,
+    min_fees: Optional[int] = None,
+    max_fees: Optional[int] = None,
+    db: AsyncSession = Depends(get_catalogue_db)
+):
+    city = normalize_city(city)
+
+    return await cached_json(
+        request,
+        ("filter", min_percentile, max_percentile, city, min_fees, max_fees),
+        lambda: query_filtered_colleges(
+            db, min_percentile, max_percentile, city, min_fees, max_fees
+        )
+    )
+
+
+# ==============================
+# 4️⃣ GET CITIES
+# ==============================
+
+@router.get("/cities")
+async def get_cities(request: Request, db: AsyncSession = Depends(get_catalogue_db)):
+    return await cached_json(request, ("cities",), lambda: query_cities(db))
+
+
+@response_cache.warmer
+async def warm_college_responses():
+    """Precompute the city list and the default filter for every city."""
+    async with CatalogueSessionLocal() as db:
+        cities = await response_cache.get_or_build(("cities",), lambda: query_cities(db))
+        city_names = orjson.loads(cities["body"])["cities"]
+
+        for city in city_names:
+            city = normalize_city(city)
+            await response_cache.get_or_build(
+                ("filter", 0, 100, city, None, None),
+                lambda city=city: query_filtered_colleges(db, 0, 100, city, None, None)
+            )
+
+
+# ==============================
+# 🔎 NEAREST COLLEGES
+# ==============================
+
+@router.post("/nearest")
+async def nearest_colleges(
+    data: NearestCollegesRequest,
+    db: AsyncSession = Depends(get_catalogue_db)
+):
+    """
+    The K colleges closest to the student's (percentile, budget) point,
+    from a KD-tree built once per dataset version and filter.
+    """
+    if not 1 <= data.k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+
+    branches = None
+    if data.branch:
+        branches = await nearest_indexes.resolve_branch(db, data.branch)
+        if not branches:
+            raise HTTPException(status_code=400, detail="Unknown branch")
+
+    index = await nearest_indexes.get(db, city=normalize_city(data.city), branches=branches)
+    matches = index.query(data.percentile, data.budget, data.k)
+
+    colleges = [
+        {
+            "id": college_id,
+            "name": name,
+            "branch": branch,
+            "cutoff": cutoff,
+            "fees": fees,
+            "city": college_city,
+            "distance": round(distance, 4),
+            "status": "Eligible" if cutoff <= data.percentile else "Reach"
+        }
+        for (college_id, name, branch, cutoff, fees, college_city), distance in matches
+    ]
+
+    return {
+        "count": len(colleges),
+        "colleges": colleges
+    }
+
+
 # ==============================
 # 5️⃣ COMPARE COLLEGES
 # ==============================
@@ -260,10 +457,11 @@ class CompareRequest(BaseModel):
     exam_type: str = "MHT-CET"
     seat_category: str = "General Open"
 
+
 @router.post("/compare")
 async def compare_colleges(
     compare_data: CompareRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_catalogue_db)
 ):
 
     # Fetch first college
@@ -288,38 +486,27 @@ async def compare_colleges(
             detail="One or both colleges not found"
         )
 
-    # Build AI prompt
-    prompt = f"""
-Compare these two engineering colleges for a student with {compare_data.student_percentile}%ile
-in {compare_data.exam_type} ({compare_data.seat_category} category).
-
-College 1:
-- Name: {college1_data.college_name}
-- Branch: {college1_data.branch_name}
-- Cutoff: {college1_data.cutoff_percentile}%
-- Fees: ₹{college1_data.fees}
-- City: {college1_data.city}
-
-College 2:
-- Name: {college2_data.college_name}
-- Branch: {college2_data.branch_name}
-- Cutoff: {college2_data.cutoff_percentile}%
-- Fees: ₹{college2_data.fees}
-- City: {college2_data.city}
-
-Provide:
-1. Admission chances
-2. Cost vs value
-3. Location pros/cons
-4. Branch strength
-5. Final recommendation
-"""
+    key = comparison_key(
+        college_info(college1_data),
+        college_info(college2_data),
+        compare_data.exam_type,
+        compare_data.seat_category,
+        compare_data.student_percentile
+    )
+    popular_comparisons.record(key)
 
     try:
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            contents=prompt
-        )
+        if overload.degraded:
+            # Only comparisons that are already cached (or prefetched)
+            result = cached_comparison(key)
+            if result is None:
+                raise overload.unavailable("Comparison is not available under current load, please retry shortly")
+            overload.note_degraded("compare")
+        else:
+            result = await get_comparison(key)
+
+        if result is None:
+            raise HTTPException(status_code=502, detail="AI comparison came back empty")
 
         return {
             "college1": {
@@ -336,7 +523,11 @@ Provide:
                 "fees": college2_data.fees,
                 "city": college2_data.city
             },
-            "comparison": response.text,
+            "comparison": result["comparison"],
+            "comparison_details": result["details"],
+            "usage": result["usage"],
+            "cached": result["cached"],
+            "cached_at": result["stored_at"],
             "student_percentile": compare_data.student_percentile,
             "chances": {
                 "college1": (
@@ -356,5 +547,7 @@ Provide:
             }
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
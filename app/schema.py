@@ -0,0 +1,83 @@
+import hashlib
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from .database import Base
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+# Idempotent upgrades for existing databases that create_all cannot do
+# (it never alters tables that already exist). Run, per dialect, whenever
+# the schema version changes.
+MIGRATIONS = {
+    "postgresql": [
+        "ALTER TABLE colleges ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+        # Earlier importers appended every run; keep the first copy of each row
+        """
+        DELETE FROM colleges a USING colleges b
+        WHERE a.college_name = b.college_name
+          AND a.branch_name = b.branch_name
+          AND a.id > b.id
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_college_branch ON colleges (college_name, branch_name)",
+    ],
+}
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table and column the models declare."""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        for column in table.columns:
+            parts.append(f"{table.name}.{column.name}:{column.type}:{column.nullable}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+async def read_meta(conn, key: str):
+    result = await conn.execute(
+        text("SELECT value FROM app_meta WHERE key = :key"),
+        {"key": key}
+    )
+    return result.scalar_one_or_none()
+
+
+async def write_meta(conn, key: str, value: str):
+    await conn.execute(text("DELETE FROM app_meta WHERE key = :key"), {"key": key})
+    await conn.execute(
+        text("INSERT INTO app_meta (key, value) VALUES (:key, :value)"),
+        {"key": key, "value": value}
+    )
+
+
+async def ensure_schema(engine) -> bool:
+    """
+    Create missing tables only when the stored schema version differs.
+
+    In the common case this is a single SELECT instead of the catalog
+    round trips `create_all` makes. Returns True when the schema was
+    (re)applied.
+    """
+    expected = schema_fingerprint()
+
+    try:
+        async with engine.connect() as conn:
+            current = await read_meta(conn, "schema_version")
+    except DBAPIError:
+        # app_meta does not exist yet
+        current = None
+
+    if current == expected:
+        return False
+
+    logger.info("Schema version %s -> %s, applying", current, expected)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in MIGRATIONS.get(conn.dialect.name, []):
+            await conn.execute(text(statement))
+        await write_meta(conn, "schema_version", expected)
+
+    return True
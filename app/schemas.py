@@ -27,10 +27,32 @@ class RecommendationRequest(BaseModel):
     percentile: float
     max_fees: int | None = None
 
+class NearestCollegesRequest(BaseModel):
+    percentile: float
+    budget: int
+    k: int = 10
+    city: str | None = None
+    branch: str | None = None
+
 class GuidanceRequest(BaseModel):
     student_type: str   # school | 11-12 | engineering
     answers: Dict[str, Any]
 
+class AIGuidance(BaseModel):
+    """Shape Gemini is constrained to for guidance replies"""
+    strengths: List[str]
+    suggested_domains: List[str]
+    roadmap: List[str]
+    chances: str
+
+class AICollegeComparison(BaseModel):
+    """Shape Gemini is constrained to for college comparisons"""
+    admission_chances: str
+    cost_vs_value: str
+    location: str
+    branch_strength: str
+    final_recommendation: str
+
 class GuidanceResponse(BaseModel):
     roadmap: str
     chances: str
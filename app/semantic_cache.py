@@ -0,0 +1,215 @@
+import re
+import time
+import uuid
+from collections import OrderedDict
+
+# Deliberately not a general stop list: negations and prepositions ("not",
+# "without", "before", "after", ...) decide what a counselling question
+# means, so they must count towards similarity.
+FILLER_WORDS = [
+    "a", "an", "the", "is", "are", "am", "was", "i", "me", "my", "please",
+    "what", "whats", "how", "do", "does", "can", "should", "could", "would",
+    "it", "this", "that", "you", "your", "tell",
+]
+
+TOKEN_PATTERN = r"(?u)\b\w+\b"
+
+
+def key_tokens(text: str) -> set:
+    """
+    Tokens a cached answer must agree on exactly: anything with a digit
+    ("92", "10th") and names written in capitals ("COEP", "VJTI", "Pune").
+    The first word is skipped unless it is all caps, since it is usually
+    just capitalised as the start of the sentence.
+    """
+    keys = set()
+    for position, token in enumerate(re.findall(TOKEN_PATTERN, text)):
+        lowered = token.lower()
+        if lowered in FILLER_WORDS:
+            continue
+        if any(c.isdigit() for c in token):
+            keys.add(lowered)
+        elif token[0].isupper() and (position > 0 or token.isupper()):
+            keys.add(lowered)
+    return keys
+
+
+def question_tokens(text: str) -> set:
+    return {token.lower() for token in re.findall(TOKEN_PATTERN, text)}
+
+
+class SemanticCache:
+    """
+    Local question -> answer cache matched by text similarity.
+
+    Questions are vectorized with a stateless HashingVectorizer (no fitting,
+    no network), so a lookup is one sparse dot product against the stored
+    questions. A similar question only counts as a match when both agree on
+    every number and name (see key_tokens): in a long question, "92" vs
+    "82" or "COEP" vs "VJTI" barely moves the similarity. Entries are evicted least-recently-used once `max_entries`
+    is reached, and expire after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 1000,
+        ttl_seconds: int = 24 * 3600,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Built on first use so importing the app does not pay for scikit-learn
+        self._vectorizer = None
+
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._matrix_ids = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------------- internals ----------------
+
+    def _vectorize(self, text: str):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            # Keep digits as tokens so "3 months" and "6 months" stay distinct,
+            # and drop only filler words so phrasing differences still match.
+            self._vectorizer = HashingVectorizer(
+                n_features=2 ** 18,
+                token_pattern=TOKEN_PATTERN,
+                stop_words=FILLER_WORDS,
+                ngram_range=(1, 2),
+                alternate_sign=False,
+                norm="l2",
+            )
+        return self._vectorizer.transform([text])
+
+    def _invalidate(self):
+        self._matrix = None
+        self._matrix_ids = []
+
+    def _expire(self, now: float):
+        expired = [
+            entry_id
+            for entry_id, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for entry_id in expired:
+            del self._entries[entry_id]
+            self.evictions += 1
+        if expired:
+            self._invalidate()
+
+    def _ensure_matrix(self):
+        if self._matrix is None and self._entries:
+            from scipy.sparse import vstack
+
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix = vstack(
+                [self._entries[entry_id]["vector"] for entry_id in self._matrix_ids]
+            ).tocsr()
+
+    # ---------------- public API ----------------
+
+    def lookup(self, question: str):
+        """Return the stored answer for the closest question above threshold."""
+        now = time.time()
+        self._expire(now)
+        self._ensure_matrix()
+
+        if self._matrix is None:
+            self.misses += 1
+            return None
+
+        vector = self._vectorize(question)
+        # Rows are L2-normalised, so the dot product is the cosine similarity.
+        similarities = (self._matrix @ vector.T).toarray().ravel()
+        keys = key_tokens(question)
+        tokens = question_tokens(question)
+
+        entry_id = None
+        for index in similarities.argsort()[::-1]:
+            if similarities[index] < self.threshold:
+                break
+            candidate = self._entries[self._matrix_ids[index]]
+            # Case-insensitive both ways, so "JEE" still matches "jee"
+            if keys <= candidate["tokens"] and candidate["keys"] <= tokens:
+                entry_id = self._matrix_ids[index]
+                break
+
+        if entry_id is None:
+            self.misses += 1
+            return None
+
+        entry = self._entries[entry_id]
+        entry["hits"] += 1
+        entry["last_hit_at"] = now
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return entry["answer"]
+
+    def store(self, question: str, answer: str):
+        if not answer:
+            return None
+
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        entry_id = uuid.uuid4().hex
+        self._entries[entry_id] = {
+            "question": question,
+            "answer": answer,
+            "vector": self._vectorize(question),
+            "tokens": question_tokens(question),
+            "keys": key_tokens(question),
+            "created_at": time.time(),
+            "last_hit_at": None,
+            "hits": 0,
+        }
+        self._invalidate()
+        return entry_id
+
+    def purge(self, entry_id: str = None) -> int:
+        """Remove one entry, or every entry when no id is given."""
+        if entry_id is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            removed = 1 if self._entries.pop(entry_id, None) is not None else 0
+        if removed:
+            self._invalidate()
+        return removed
+
+    def entries(self, limit: int = 50) -> list:
+        # Most recently used first
+        items = list(reversed(self._entries.items()))[:limit]
+        return [
+            {
+                "id": entry_id,
+                "question": entry["question"],
+                "answer": entry["answer"],
+                "hits": entry["hits"],
+                "created_at": entry["created_at"],
+                "last_hit_at": entry["last_hit_at"],
+            }
+            for entry_id, entry in items
+        ]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import re
+
+
+def prompt_key(prompt: str) -> str:
+    """Key identical prompts the same way regardless of incidental whitespace."""
+    normalized = re.sub(r"\s+", " ", prompt).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive the same result or
+    exception. Results are not kept once the call finishes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def _finish(self, key, call, task):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    async def do(self, key: str, fn):
+        call = self._calls.get(key)
+
+        if call is None:
+            call = {"task": asyncio.ensure_future(fn()), "waiters": 0}
+            self._calls[key] = call
+            call["task"].add_done_callback(
+                lambda task, key=key, call=call: self._finish(key, call, task)
+            )
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call["waiters"] += 1
+        try:
+            # shield() so one client disconnecting does not cancel the
+            # upstream call the other waiters depend on.
+            return await asyncio.shield(call["task"])
+        finally:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                # Every waiter went away: stop the upstream call and let the
+                # next request for this key start a fresh one.
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call["task"].cancel()
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
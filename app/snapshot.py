@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .dataset import on_version_change
+
+logger = logging.getLogger(__name__)
+
+# ==============================
+# Columnar college snapshot
+# ==============================
+# load_csv.py writes one directory per dataset version:
+#
+#   <root>/v<version>/manifest.json
+#   <root>/v<version>/<column>.npy              id, cutoff, fees, *_code
+#   <root>/v<version>/<table>.offsets.npy       string tables (names,
+#   <root>/v<version>/<table>.utf8.npy           branches, cities)
+#   <root>/CURRENT                              version being served
+#
+# Workers np.load() the columns with mmap_mode="r", so every uvicorn worker
+# shares the same page-cache pages instead of holding its own copy.
+
+SNAPSHOT_ROOT = Path(os.getenv(
+    "COLLEGE_SNAPSHOT_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "snapshots"
+))
+
+NUMERIC_COLUMNS = ("id", "cutoff", "fees", "name_code", "branch_code", "city_code")
+STRING_TABLES = ("names", "branches", "cities")
+
+
+# ---------------- writing ----------------
+
+def _write_string_table(directory: Path, name: str, values: list):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    np.save(directory / f"{name}.offsets.npy", offsets)
+    np.save(directory / f"{name}.utf8.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def _encode(values: list, table: list, index: dict) -> np.ndarray:
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        if value not in index:
+            index[value] = len(table)
+            table.append(value)
+        codes[i] = index[value]
+    return codes
+
+
+def write_snapshot(rows, version: str, root: Path = SNAPSHOT_ROOT) -> Path:
+    """
+    Write `rows` of (id, college_name, branch_name, cutoff_percentile, fees,
+    city) as snapshot `version` and atomically point CURRENT at it.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    final_dir = root / f"v{version}"
+    tmp_dir = root / f"v{version}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    ids, names, branches, cutoffs, fees, cities = zip(*rows) if rows else ([],) * 6
+
+    tables = {name: [] for name in STRING_TABLES}
+    columns = {
+        "id": np.asarray(ids, dtype=np.int64),
+        "cutoff": np.asarray([np.nan if c is None else c for c in cutoffs], dtype=np.float64),
+        "fees": np.asarray(fees, dtype=np.int64),
+        "name_code": _encode(names, tables["names"], {}),
+        "branch_code": _encode(branches, tables["branches"], {}),
+        "city_code": _encode(cities, tables["cities"], {}),
+    }
+
+    for name, values in columns.items():
+        np.save(tmp_dir / f"{name}.npy", values)
+    for name, values in tables.items():
+        _write_string_table(tmp_dir, name, values)
+
+    with open(tmp_dir / "manifest.json", "w") as f:
+        json.dump({"version": version, "rows": len(ids), "created_at": time.time()}, f)
+
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.replace(tmp_dir, final_dir)
+
+    pointer = root / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, root / "CURRENT")
+
+    return final_dir
+
+
+def snapshot_version(root: Path = SNAPSHOT_ROOT) -> str:
+    """Version CURRENT points at, or None if either is missing."""
+    pointer = root / "CURRENT"
+    if not pointer.exists():
+        return None
+    version = pointer.read_text().strip()
+    return version if (root / f"v{version}").is_dir() else None
+
+
+def prune_snapshots(keep: int = 2, root: Path = SNAPSHOT_ROOT):
+    """Remove all but the newest `keep` snapshot directories."""
+    directories = sorted(
+        (d for d in root.glob("v*") if d.is_dir() and not d.name.endswith(".tmp")),
+        key=lambda d: d.stat().st_mtime
+    )
+    for directory in directories[:-keep]:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ---------------- reading ----------------
+
+class StringTable:
+    """Strings stored as one UTF-8 blob plus offsets, decoded on access."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+        self._decoded = {}
+        self._codes = None
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, code: int):
+        if code < 0:
+            return None
+        value = self._decoded.get(code)
+        if value is None:
+            start, end = self._offsets[code], self._offsets[code + 1]
+            value = self._blob[start:end].tobytes().decode("utf-8")
+            self._decoded[code] = value
+        return value
+
+    def code_of(self, value: str) -> int:
+        if self._codes is None:
+            self._codes = {self[code]: code for code in range(len(self))}
+        return self._codes.get(value, -2)  # -2 matches nothing, not even NULL (-1)
+
+
+class CollegeSnapshot:
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        with open(directory / "manifest.json") as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+
+        for name in NUMERIC_COLUMNS:
+            setattr(self, name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+
+        self.tables = {
+            name: StringTable(
+                np.load(directory / f"{name}.offsets.npy", mmap_mode="r"),
+                np.load(directory / f"{name}.utf8.npy", mmap_mode="r"),
+            )
+            for name in STRING_TABLES
+        }
+
+    def __len__(self):
+        return len(self.id)
+
+    def mask(
+        self,
+        min_percentile=None,
+        max_percentile=None,
+        city=None,
+        min_fees=None,
+        max_fees=None
+    ) -> np.ndarray:
+        """Boolean row mask with SQL semantics: a NULL cutoff never matches a bound."""
+        mask = np.ones(len(self), dtype=bool)
+
+        if min_percentile is not None:
+            mask &= self.cutoff >= min_percentile
+        if max_percentile is not None:
+            mask &= self.cutoff <= max_percentile
+        if city:
+            mask &= self.city_code == self.tables["cities"].code_of(city)
+        if min_fees is not None:
+            mask &= self.fees >= min_fees
+        if max_fees is not None:
+            mask &= self.fees <= max_fees
+
+        return mask
+
+    def rows(self, mask: np.ndarray) -> list:
+        """(id, name, branch, cutoff, fees, city) tuples for the masked rows."""
+        indices = np.flatnonzero(mask)
+        names = self.tables["names"]
+        branches = self.tables["branches"]
+        cities = self.tables["cities"]
+
+        cutoffs = self.cutoff[indices]
+        return list(zip(
+            self.id[indices].tolist(),
+            [names[code] for code in self.name_code[indices].tolist()],
+            [branches[code] for code in self.branch_code[indices].tolist()],
+            [None if np.isnan(c) else c for c in cutoffs.tolist()],
+            self.fees[indices].tolist(),
+            [cities[code] for code in self.city_code[indices].tolist()],
+        ))
+
+    def cities(self) -> list:
+        used = np.unique(self.city_code)
+        return [self.tables["cities"][code] for code in used.tolist() if code >= 0]
+
+
+class SnapshotStore:
+    """Holds the snapshot being served; swapping is a single reference assignment."""
+
+    def __init__(self, root: Path = SNAPSHOT_ROOT):
+        self.root = root
+        self.current = None
+
+    def load(self, version: str = None):
+        if version is None:
+            pointer = self.root / "CURRENT"
+            if not pointer.exists():
+                return None
+            version = pointer.read_text().strip()
+
+        if self.current is not None and self.current.version == version:
+            return self.current
+
+        directory = self.root / f"v{version}"
+        if not directory.exists():
+            logger.info("No college snapshot for dataset version %s, reading from DB", version)
+            self.current = None
+            return None
+
+        start = time.perf_counter()
+        self.current = CollegeSnapshot(directory)
+        logger.info(
+            "Mapped college snapshot v%s (%d rows) in %.2f ms",
+            version, len(self.current), (time.perf_counter() - start) * 1000
+        )
+        return self.current
+
+    def stats(self) -> dict:
+        if self.current is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": self.current.version,
+            "rows": len(self.current),
+            "path": str(self.current.directory),
+        }
+
+
+snapshot_store = SnapshotStore()
+
+
+@on_version_change
+def _swap_snapshot(version):
+    if version is not None:
+        snapshot_store.load(version)
@@ -0,0 +1,53 @@
+import importlib
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """
+    Records how long each app module takes to import and each startup step
+    takes to run.
+
+    Modules are imported in dependency order, so each timing is that
+    module's own marginal cost rather than the cost of everything it pulls in.
+    """
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.imports = {}
+        self.steps = {}
+
+    def import_modules(self, names):
+        for name in names:
+            start = time.perf_counter()
+            importlib.import_module(name)
+            self.imports[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def report(self) -> dict:
+        return {
+            "imports_ms": self.imports,
+            "steps_ms": self.steps,
+            "total_imports_ms": round(sum(self.imports.values()), 2),
+            "total_steps_ms": round(sum(self.steps.values()), 2),
+            "since_first_import_ms": round((time.perf_counter() - self.created_at) * 1000, 2),
+        }
+
+    def log(self):
+        for name, ms in sorted(self.imports.items(), key=lambda item: -item[1]):
+            logger.info("import %-24s %8.2f ms", name, ms)
+        for name, ms in self.steps.items():
+            logger.info("startup %-23s %8.2f ms", name, ms)
+
+
+startup_profile = StartupProfile()
@@ -7,11 +7,14 @@ from datetime import date
 from .database import get_db
 from .models import Task
 from .schemas import TaskCreate, TaskResponse
+from .overload import shed_when_overloaded
 
 
 router = APIRouter(
     prefix="/tasks",
-    tags=["Task Keeper"]
+    tags=["Task Keeper"],
+    # Low priority on exam day: shed first when the service is degraded
+    dependencies=[Depends(shed_when_overloaded)]
 )
 
 # ============================
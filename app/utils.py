@@ -1,3 +1,6 @@
+import os
+import secrets
+
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -7,3 +10,7 @@ def hash_password(password: str):
 
 def verify_password(password: str, hashed: str):
     return pwd_context.verify(password, hashed)
+
+def is_admin_token(token: str):
+    admin_token = os.getenv("ADMIN_TOKEN")
+    return bool(admin_token and token and secrets.compare_digest(token, admin_token))
@@ -0,0 +1,38 @@
+"""
+Lookups per second for the career rules engine.
+
+    python benchmarks/bench_career_rules.py [N]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.career_logic import career_rules, recommend_careers, recommend_careers_batch
+
+
+def main(n: int = 200_000):
+    exams = career_rules.exams() + ["UNKNOWN"]
+    rng = random.Random(42)
+    sample_exams = [rng.choice(exams) for _ in range(n)]
+    sample_percentiles = [rng.uniform(0, 100) for _ in range(n)]
+
+    start = time.perf_counter()
+    for exam, percentile in zip(sample_exams, sample_percentiles):
+        recommend_careers(exam, percentile)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recommend_careers_batch(sample_exams, sample_percentiles)
+    batch = time.perf_counter() - start
+
+    print(f"exams loaded:    {len(exams) - 1}")
+    print(f"lookups:         {n}")
+    print(f"scalar:          {n / scalar:,.0f} lookups/s")
+    print(f"batch:           {n / batch:,.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,89 @@
+"""
+Query throughput of the read-only SQLite catalogue, fully offline.
+
+Publishes a synthetic catalogue to a temporary directory and runs the
+recommendation router's filter, cities and recommend queries against it.
+
+    python benchmarks/bench_catalogue.py [ROWS] [QUERIES]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+CITIES = ["Mumbai", "Pune", "Nagpur", "Nashik", "Amravati", "Akola", "Thane", "Solapur", None]
+BRANCHES = ["Computer Engineering", "Information Technology", "Mechanical Engineering",
+            "Civil Engineering", "Electrical Engineering", "Electronics and Telecommunication"]
+
+
+def synthetic_rows(n: int, rng: random.Random) -> list:
+    return [
+        (
+            i + 1,
+            f"College {i // len(BRANCHES)}",
+            BRANCHES[i % len(BRANCHES)],
+            None if rng.random() < 0.05 else round(rng.uniform(30, 100), 2),
+            rng.randrange(50_000, 300_000, 5_000),
+            rng.choice(CITIES),
+            None,
+        )
+        for i in range(n)
+    ]
+
+
+async def timed(label: str, queries: int, fn):
+    start = time.perf_counter()
+    for i in range(queries):
+        await fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {queries / elapsed:>10,.0f} queries/s   {elapsed / queries * 1000:.3f} ms/query")
+
+
+async def run(rows: int, queries: int):
+    from app.catalogue import write_catalogue
+    from app.database import CatalogueSessionLocal, catalogue_engine
+    from app.recommendation import query_cities, query_eligible_colleges, query_filtered_colleges
+    from app.schemas import RecommendationRequest
+
+    rng = random.Random(42)
+    path = Path(os.environ["CATALOGUE_SQLITE_PATH"])
+
+    start = time.perf_counter()
+    write_catalogue(synthetic_rows(rows, rng), "1", path)
+    print(f"rows:            {rows}")
+    print(f"publish:         {(time.perf_counter() - start) * 1000:.1f} ms, {path.stat().st_size / 1024:.0f} KiB")
+
+    cities = [city for city in CITIES if city]
+
+    async with CatalogueSessionLocal() as db:
+        await timed("filter", queries, lambda i: query_filtered_colleges(
+            db, rng.uniform(30, 80), 100, cities[i % len(cities)], None, rng.randrange(100_000, 300_000, 5_000)
+        ))
+        await timed("cities", queries, lambda i: query_cities(db))
+        await timed("recommend", queries, lambda i: query_eligible_colleges(db, RecommendationRequest(
+            exam="JEE", percentile=rng.uniform(40, 100), max_fees=rng.randrange(100_000, 300_000, 5_000)
+        )))
+
+    await catalogue_engine.dispose()
+
+
+def main(rows: int = 5_000, queries: int = 2_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Everything lives in the temp directory: no database server, no
+        # snapshot (so queries really hit SQLite), no network.
+        os.environ["CATALOGUE_SQLITE_PATH"] = str(Path(tmp) / "catalogue.sqlite")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tmp) / 'main.sqlite'}"
+        os.environ["COLLEGE_SNAPSHOT_DIR"] = str(Path(tmp) / "snapshots")
+        asyncio.run(run(rows, queries))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2_000,
+    )
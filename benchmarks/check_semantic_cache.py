@@ -0,0 +1,62 @@
+"""
+Sanity check for the counselor's semantic cache: paraphrases must hit, and
+questions that differ only in a negation, preposition, number or college
+name must miss.
+
+    python benchmarks/check_semantic_cache.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.semantic_cache import SemanticCache
+
+SHOULD_HIT = [
+    ("What is the JEE cutoff for COEP?", "what is the jee cutoff for COEP"),
+    ("How to prepare for MHT-CET in 3 months", "how should I prepare for MHT-CET in 3 months"),
+    ("what is the cutoff for COEP", "tell me the cutoff for COEP"),
+    (
+        "I got 92 percentile in MHT-CET, which colleges can I get for computer engineering",
+        "i got 92 percentile in mht-cet which colleges can i get for computer engineering",
+    ),
+]
+
+SHOULD_MISS = [
+    ("can I get into COEP without JEE", "can I get into COEP with JEE"),
+    ("should I take PCM after 10th", "should I not take PCM after 10th"),
+    ("should I take PCM after 10th", "should I take PCM before 10th"),
+    ("is JEE required for COEP", "is JEE not required for COEP"),
+    ("How to prepare for MHT-CET in 3 months", "How to prepare for MHT-CET in 6 months"),
+    (
+        "I got 92 percentile in MHT-CET from the open category, which colleges can I get for computer engineering",
+        "I got 82 percentile in MHT-CET from the open category, which colleges can I get for computer engineering",
+    ),
+    (
+        "What was the last round cutoff for computer engineering at COEP in the open category",
+        "What was the last round cutoff for computer engineering at VJTI in the open category",
+    ),
+    (
+        "Which subjects should I focus on in class 10 to prepare for engineering entrance exams",
+        "Which subjects should I focus on in class 12 to prepare for engineering entrance exams",
+    ),
+]
+
+
+def main() -> int:
+    failures = 0
+
+    for stored, asked in SHOULD_HIT + SHOULD_MISS:
+        cache = SemanticCache(threshold=0.9)
+        cache.store(stored, "answer")
+        hit = cache.lookup(asked) is not None
+        expected = (stored, asked) in SHOULD_HIT
+        status = "ok  " if hit == expected else "FAIL"
+        failures += hit != expected
+        print(f"{status} {'hit ' if hit else 'miss'} {stored!r} / {asked!r}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())